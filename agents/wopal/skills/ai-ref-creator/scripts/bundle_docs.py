@@ -4,23 +4,57 @@ Smart Document Chunking Script
 
 Intelligently splits Markdown documents into chunks based on size limits:
 - Large files split by headings (## first, then ###)
+- Fenced code blocks are never split by headings or left unclosed in a chunk
 - Adjacent small sections auto-merged
-- Small files grouped by directory
-- Generates manifest.json for parallel processing
+- Small files packed by directory (first-fit-decreasing, nearby directories merged when they cannot fill a bundle)
+- Generates manifest.json for parallel processing, with the byte offset, length
+  and SHA-256 of every source inside its bundle
+- Re-runs only rebuild bundles whose source files changed
+- Optional near-duplicate detection bundles one file per cluster (aliases in the manifest)
 - All paths are relative to project root (auto-detected)
 
 Usage:
-    python bundle_docs.py -i <input_dir> -o <output_dir> --max-size <KB>
+    python bundle_docs.py -i <input_dir> -o <output_dir> --max-size <KB> [--jobs N] [--full]
+    python bundle_docs.py -i <input_dir> -o <output_dir> --max-tokens <N>
+    python bundle_docs.py -i <input_dir> -o <output_dir> --dedup [--dedup-threshold 0.9]
 
 Example:
     python bundle_docs.py -i ./docs -o ./bundles --max-size 40
 """
 
 import os
+import re
 import shutil
 import argparse
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
 import json
+import hashlib
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from merge_refs import estimate_token_count
+
+# Characters read per block when streaming a large file by paragraphs
+READ_BLOCK_SIZE = 1 << 20
+
+# Metadata overhead per file in token mode (~200 bytes at ~4 bytes per token)
+TOKEN_META_SIZE_PER_FILE = 50
+
+# Opening code fence: up to 3 spaces, then 3+ backticks or tildes
+FENCE_PATTERN = re.compile(r" {0,3}(`{3,}|~{3,})")
+
+# Upper bound of UTF-8 bytes per token (>= 1 token per 4 characters, <= 4 bytes
+# per character); larger files cannot fit a token budget and are not estimated
+MAX_BYTES_PER_TOKEN = 16
+
+# Near-duplicate detection (--dedup): MinHash over word shingles, LSH banding
+SHINGLE_SIZE = 5
+SHINGLE_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[^\sa-z0-9]")  # ASCII words, any other character alone
+MINHASH_BINS = 64
+LSH_BANDS = 16  # 4 rows per band: pairs above ~0.5 similarity usually become candidates
+DEFAULT_DEDUP_THRESHOLD = 0.9
 
 
 def find_project_root(start_path: Path) -> Path:
@@ -67,29 +101,175 @@ def resolve_symlink_preserved(input_path: str, project_root: Path) -> tuple[Path
     return absolute_path, user_input_base
 
 
-def get_file_size(fp: Path) -> int:
-    """Get file size in bytes"""
-    return fp.stat().st_size
+# Directories never descended into while collecting Markdown files
+SKIP_DIR_NAMES = {"assets", "images"}
 
 
-def get_bundle_meta_size(file_count: int) -> int:
+def scan_markdown_files(source_path: Path) -> list[tuple[Path, int]]:
+    """
+    Collect (path, size) for all .md/.mdx files under source_path
+
+    Single os.scandir walk in os.walk order (files of a directory first,
+    then subdirectories depth-first); sizes come from the DirEntry stat,
+    so every file is stat'ed exactly once.
+    """
+    files = []
+    stack = [source_path]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            entries = os.scandir(current)
+        except OSError as e:
+            print(f"Error scanning {current}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                # A bad entry (e.g. a broken symlink) only skips itself
+                try:
+                    if entry.is_dir():
+                        if entry.name not in SKIP_DIR_NAMES and not entry.is_symlink():
+                            subdirs.append(Path(entry.path))
+                    elif entry.name.endswith((".md", ".mdx")):
+                        files.append((Path(entry.path), entry.stat().st_size))
+                except OSError as e:
+                    print(f"Error scanning {entry.path}: {e}")
+        stack.extend(reversed(subdirs))
+    return files
+
+
+def get_bundle_meta_size(file_count: int, per_file: int = 200) -> int:
     """Estimate metadata overhead (path info, etc.)"""
-    return file_count * 200
+    return file_count * per_file
+
 
+def byte_size(text: str) -> int:
+    """Size of text in UTF-8 bytes (default bundle size measure)"""
+    return len(text.encode("utf-8"))
 
-def split_by_heading_level(content: str, heading_marker: str) -> list[dict]:
-    """Split content by specified heading level"""
-    lines = content.split("\n")
-    sections = []
+
+def fit_prefix_length(text: str, limit: int, measure: Callable[[str], int], start: int = 0) -> int:
+    """
+    Longest length (in characters, at least 1) from start whose measured size fits limit
+
+    Galloping then binary search, so only prefixes up to twice the result are measured.
+    """
+    available = len(text) - start
+    lo, hi = 0, max(1, limit)
+    while hi < available and measure(text[start:start + hi]) <= limit:
+        lo, hi = hi, hi * 2
+    hi = min(hi, available)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if measure(text[start:start + mid]) <= limit:
+            lo = mid
+        else:
+            hi = mid - 1
+    return max(lo, 1)
+
+
+def iter_lines(fp: Path) -> Iterator[str]:
+    """Stream a file's lines without trailing newlines"""
+    with open(fp, encoding="utf-8") as f:
+        for line in f:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def iter_paragraphs(fp: Path) -> Iterator[str]:
+    """
+    Stream a file split on blank-line separators ("\n\n"), same result as
+    content.split("\n\n") but reading READ_BLOCK_SIZE characters at a time
+    """
+    pending = []    # pieces of the current paragraph (contain no separator)
+    tail = ""       # last character of pending, to catch a separator split across blocks
+    with open(fp, encoding="utf-8") as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            if "\n\n" not in block and not (tail == "\n" and block.startswith("\n")):
+                pending.append(block)
+                tail = block[-1]
+                continue
+            parts = ("".join(pending) + block).split("\n\n")
+            last = parts.pop()
+            yield from parts
+            pending = [last]
+            tail = last[-1:]
+    yield "".join(pending)
+
+
+def next_fence(line: str, fence: Optional[tuple[str, str]]) -> Optional[tuple[str, str]]:
+    """
+    Fenced code block state after line: None outside code, else (marker, opening line)
+
+    A fence opens with 3+ backticks or tildes indented by at most 3 spaces, and
+    closes with the same character, at least as long, and nothing else on the line.
+    """
+    match = FENCE_PATTERN.match(line)
+    if fence is None:
+        if match and not (match.group(1)[0] == "`" and "`" in line[match.end():]):
+            return match.group(1), line
+        return None
+    if (match and match.group(1)[0] == fence[0][0] and len(match.group(1)) >= len(fence[0]) and
+            not line[match.end():].strip()):
+        return None
+    return fence
+
+
+def mark_code_lines(lines: Iterable[str]) -> Iterator[tuple[str, bool]]:
+    """Yield (line, in_code) in one pass; in_code covers fence lines and everything between them"""
+    fence = None
+    for line in lines:
+        new_fence = next_fence(line, fence)
+        yield line, fence is not None or new_fence is not None
+        fence = new_fence
+
+
+def join_fenced_paragraphs(paragraphs: Iterable[str]) -> Iterator[str]:
+    """Re-join blank-line separated paragraphs that split a fenced code block"""
+    fence = None
+    pending = []
+    for para in paragraphs:
+        for line in para.split("\n"):
+            fence = next_fence(line, fence)
+        pending.append(para)
+        if fence is None:
+            yield "\n\n".join(pending)
+            pending = []
+    if pending:
+        yield "\n\n".join(pending)
+
+
+def count_heading_sections(fp: Path) -> tuple[int, int]:
+    """
+    Number of sections split_by_heading_level would yield for ## and ###,
+    computed in one streaming pass without building the sections
+    """
+    markers = ("##", "###")
+    headings = {marker: 0 for marker in markers}
+    has_preamble = {marker: False for marker in markers}
+    for line, in_code in mark_code_lines(iter_lines(fp)):
+        for marker in markers:
+            if not in_code and line.startswith(marker + " "):
+                headings[marker] += 1
+            elif headings[marker] == 0 and not has_preamble[marker] and line.strip():
+                has_preamble[marker] = True
+    return tuple(headings[m] + int(has_preamble[m]) for m in markers)
+
+
+def split_by_heading_level(lines: Iterable[str], heading_marker: str) -> Iterator[dict]:
+    """Split lines by specified heading level (ignoring fenced code), yielding one section at a time"""
+    prefix = heading_marker + " "
     current_section = []
     current_title = "Introduction"
 
-    for line in lines:
-        if line.startswith(heading_marker + " "):
+    for line, in_code in mark_code_lines(lines):
+        if not in_code and line.startswith(prefix):
             if current_section:
                 section_content = "\n".join(current_section).strip()
                 if section_content:
-                    sections.append({"title": current_title, "content": section_content})
+                    yield {"title": current_title, "content": section_content}
             current_title = line[len(heading_marker)+1:].strip()
             current_section = [line]
         else:
@@ -98,28 +278,27 @@ def split_by_heading_level(content: str, heading_marker: str) -> list[dict]:
     if current_section:
         section_content = "\n".join(current_section).strip()
         if section_content:
-            sections.append({"title": current_title, "content": section_content})
+            yield {"title": current_title, "content": section_content}
 
-    return sections
 
-
-def split_by_paragraphs(content: str, max_size: int) -> list[dict]:
+def split_by_paragraphs(paragraphs: Iterable[str], max_size: int,
+                        measure: Callable[[str], int] = byte_size) -> Iterator[dict]:
     """Split by paragraphs, preserving paragraph integrity"""
-    paragraphs = content.split("\n\n")
-    sections = []
     current_content = []
     current_size = 0
+    count = 0
+    separator_size = measure("\n\n")
 
     for para in paragraphs:
-        para_size = len(para.encode("utf-8"))
-        para_with_newline = para + "\n\n"
-        para_with_newline_size = len(para_with_newline.encode("utf-8"))
+        para_size = measure(para)
+        para_with_newline_size = para_size + separator_size
 
         if current_size + para_with_newline_size > max_size and current_content:
-            sections.append({
-                "title": f"Paragraph {len(sections)+1}",
+            count += 1
+            yield {
+                "title": f"Paragraph {count}",
                 "content": "\n\n".join(current_content).strip()
-            })
+            }
             current_content = [para]
             current_size = para_size
         else:
@@ -127,106 +306,605 @@ def split_by_paragraphs(content: str, max_size: int) -> list[dict]:
             current_size += para_with_newline_size
 
     if current_content:
-        sections.append({
-            "title": f"Paragraph {len(sections)+1}",
+        yield {
+            "title": f"Paragraph {count + 1}",
             "content": "\n\n".join(current_content).strip()
-        })
+        }
 
-    return sections
 
+def scan_fence(buf, start: int, stop: int, fence: Optional[tuple[str, str]],
+               at_line_start: bool = True) -> Optional[tuple[str, str]]:
+    """
+    Fence state after the complete lines of buf (bytes or str) between start and stop
 
-def force_split(content: str, title_prefix: str, max_size: int) -> list[dict]:
-    """Force split by character count, preferring newline boundaries"""
-    result = []
-    remaining = content
-    chunk_num = 1
+    With at_line_start=False, start is inside a line, which cannot be a fence delimiter.
+    """
+    is_bytes = isinstance(buf, bytes)
+    newline, space = (b"\n", b" ") if is_bytes else ("\n", " ")
+    fence_chars = (b"`", b"~") if is_bytes else ("`", "~")
+    pos = start
+    while True:
+        line_end = buf.find(newline, pos, stop)
+        if line_end == -1:
+            return fence
+        line = buf[pos:line_end]
+        if (pos > start or at_line_start) and line.lstrip(space)[:1] in fence_chars:
+            fence = next_fence(line.decode("utf-8", errors="replace") if is_bytes else line, fence)
+        pos = line_end + 1
+
+
+def find_cut(buf, start: int, end: int, fence: Optional[tuple[str, str]],
+             at_line_start: bool = True) -> tuple[int, Optional[tuple[str, str]]]:
+    """
+    Where to cut buf (bytes or str) between start and end, past the halfway point
 
-    while remaining:
-        if len(remaining.encode("utf-8")) <= max_size:
-            result.append({
-                "title": f"{title_prefix} - Part {chunk_num}",
-                "content": remaining.strip(),
-                "size": len(remaining.encode("utf-8"))
-            })
-            break
+    Prefers, in order: a blank line outside code, a line break outside code, a
+    line break inside a fenced block (leaving room to close it), a space outside
+    code, the window end. fence is the fenced block open at start; see
+    scan_fence for at_line_start. Only lines that may be fence delimiters are
+    decoded. A cut inside a line never leaves a fence marker at the start of
+    the next part.
 
-        chunk = remaining[:max_size]
-        last_newline = chunk.rfind("\n")
-        if last_newline > max_size * 0.5:
-            chunk = chunk[:last_newline]
+    Returns:
+        (cut offset, open fence at the cut or None)
+    """
+    is_bytes = isinstance(buf, bytes)
+    newline, space = (b"\n", b" ") if is_bytes else ("\n", " ")
+    fence_chars = (b"`", b"~") if is_bytes else ("`", "~")
+    half = start + (end - start) * 0.5
+    block_cut = line_cut = code_cut = None
+    start_fence = fence
+    pos = start
+
+    def reopenable(open_fence: tuple[str, str]) -> Optional[tuple[str, str]]:
+        # The next part starts with the opening line, or the bare marker if that line is too long
+        if len(open_fence[1]) * 2 < end - start:
+            return open_fence
+        if len(open_fence[0]) * 2 < end - start:
+            return open_fence[0], open_fence[0]
+        return None
 
-        result.append({
-            "title": f"{title_prefix} - Part {chunk_num}",
-            "content": chunk.strip(),
-            "size": len(chunk.encode("utf-8"))
-        })
+    while True:
+        line_end = buf.find(newline, pos, end)
+        if line_end == -1:
+            break
+        line = buf[pos:line_end]
+        if (pos > start or at_line_start) and line.lstrip(space)[:1] in fence_chars:
+            fence = next_fence(line.decode("utf-8", errors="replace") if is_bytes else line, fence)
+        if line_end > half:
+            if fence is None:
+                line_cut = line_end
+                if not line.strip():
+                    block_cut = line_end
+            elif line_end + 1 + len(fence[0]) <= end and reopenable(fence):
+                code_cut = (line_end, reopenable(fence))
+        pos = line_end + 1
+
+    if block_cut is not None:
+        return block_cut, None
+    if line_cut is not None:
+        return line_cut, None
+    if code_cut is not None:
+        return code_cut
+
+    in_code = fence is not None and reopenable(fence) is not None
+    if in_code:
+        # Leave room to close the fence
+        cut = max(end - 1 - len(fence[0]), start + 1)
+    else:
+        space_cut = buf.rfind(space, pos, end) if fence is None else -1
+        cut, fence = (space_cut if space_cut > half else end), None
+    line_start = buf.rfind(newline, start, cut) + 1
+    if line_start > start and buf[line_start:end].lstrip(space)[:1] in fence_chars:
+        # Never cut through a line that may open or close a fence
+        cut = line_start
+    elif line_start < cut or not at_line_start:
+        # The rest of the line starts the next part: keep fence markers off its start
+        next_char = cut
+        while buf[next_char:next_char + 1] == space:
+            next_char += 1
+        if buf[next_char:next_char + 1] in fence_chars:
+            back = cut
+            while back > start + 1 and buf[back - 1:back] in fence_chars + (space,):
+                back -= 1
+            if back - 1 > start:
+                cut = back - 1
+    if in_code:
+        # The line holding the cut may have changed the state
+        fence = scan_fence(buf, start, cut, start_fence, at_line_start)
+        fence = reopenable(fence) if fence is not None else None
+    if is_bytes:
+        # Never cut inside a UTF-8 sequence
+        while cut > start and (buf[cut] & 0xC0) == 0x80:
+            cut -= 1
+        if cut == start:
+            cut += 1
+            while cut < len(buf) and (buf[cut] & 0xC0) == 0x80:
+                cut += 1
+    return max(cut, start + 1), fence
+
+
+def force_split(content: str, title_prefix: str, max_size: int,
+                measure: Callable[[str], int] = byte_size) -> Iterator[dict]:
+    """
+    Force split oversized content, preferring block and line boundaries
+
+    Works on offsets into one buffer: the UTF-8 encoding in byte mode, so parts
+    never exceed max_size bytes, or the text itself for other measures, where
+    each part is measured as written (fences closed) and cut shorter if needed.
+    Linear in the content size. A cut inside a fenced code block closes the fence at
+    the end of the part and reopens it with the same opening line at the start
+    of the next one.
+    """
+    is_bytes = measure is byte_size
+    buf = content.encode("utf-8") if is_bytes else content
+    whitespace = b" \t\n\r\x0b\x0c" if is_bytes else " \t\n\r\x0b\x0c"
+    size = len(buf.rstrip())
+    newline = b"\n" if is_bytes else "\n"
+    pos = 0
+    fence = None
+    chunk_num = 1
 
-        remaining = remaining[len(chunk):].strip()
-        chunk_num += 1
+    while True:
+        cut = pos
+        while pos < size and buf[pos:pos + 1] in whitespace:
+            pos += 1
+        if pos >= size:
+            break
+        line_start = buf.rfind(newline, cut, pos) + 1
+        if line_start:
+            # Keep the indentation: it decides whether the line can be a fence
+            pos = line_start
+        at_line_start = cut == 0 or buf[cut - 1:cut] == newline or line_start > 0
+
+        prefix = fence[1] + "\n" if fence is not None else ""
+        if is_bytes:
+            window = max_size - len(prefix.encode("utf-8"))
+            fits = size - pos <= window
+        else:
+            window = fit_prefix_length(buf, max_size - measure(prefix), measure, pos)
+            fits = pos + window >= size
 
-    return result
+        while True:
+            if fits:
+                cut, next_fence_state = size, None
+            else:
+                cut, next_fence_state = find_cut(buf, pos, pos + max(window, 1), fence, at_line_start)
+
+            piece = buf[pos:cut]
+            chunk = (prefix + (piece.decode("utf-8") if is_bytes else piece)).rstrip()
+            if next_fence_state is not None and cut < size:
+                chunk += "\n" + next_fence_state[0]
+            if is_bytes or cut - pos <= 1:
+                break
+            # Other measures can grow once the part is complete (a closed code
+            # block counts at the code rate): shrink the window until it fits
+            chunk_size = measure(chunk)
+            if chunk_size <= max_size:
+                break
+            window = min(cut - pos - 1, (cut - pos) * max_size // chunk_size)
+            fits = False
+
+        pos = cut
+        fence = next_fence_state if cut < size else None
+
+        yield {"title": f"{title_prefix} - Part {chunk_num}", "content": chunk}
+        chunk_num += 1
 
 
-def split_large_file_by_headings(fp: Path, rel_path: Path, max_size: int) -> list[dict]:
+def iter_large_file_chunks(fp: Path, max_size: int, measure: Callable[[str], int] = byte_size) -> Iterator[dict]:
     """
-    Split large file by headings
-    Prefer ## first, then ###
+    Split large file by headings, yielding chunks one at a time
+    Prefer ## first, then ###, then paragraphs
     Adjacent small sections auto-merged
-    """
-    content = fp.read_text(encoding="utf-8")
 
-    # Try splitting by H2 first
-    sections = split_by_heading_level(content, "##")
+    Only the current section and the chunk being merged are held in memory.
+    max_size is in the unit of measure (bytes by default, or estimated tokens);
+    each section is measured once and merged chunks are sized by adding up
+    section sizes. Chunks carry "size" in bytes, plus "tokens" in token mode.
+    """
+    h2_sections, h3_sections = count_heading_sections(fp)
+    if h2_sections > 1:
+        sections = split_by_heading_level(iter_lines(fp), "##")
+    elif h3_sections > 1:
+        sections = split_by_heading_level(iter_lines(fp), "###")
+    else:
+        sections = split_by_paragraphs(join_fenced_paragraphs(iter_paragraphs(fp)), max_size, measure)
 
-    if len(sections) <= 1:
-        sections = split_by_heading_level(content, "###")
+    def finish(chunk: dict) -> dict:
+        chunk["size"] = len(chunk["content"].encode("utf-8"))
+        if measure is not byte_size:
+            chunk["tokens"] = measure(chunk["content"])
+        return chunk
 
-    if len(sections) <= 1:
-        sections = split_by_paragraphs(content, max_size)
+    def make_chunk(titles: list[str], contents: list[str]) -> dict:
+        return finish({"title": " + ".join(titles), "content": "\n\n".join(contents)})
 
     # Merge adjacent small sections
-    result = []
-    current_chunk = None
+    titles = []
+    contents = []
     current_size = 0
 
     for section in sections:
-        section_size = len(section["content"].encode("utf-8"))
+        section_size = measure(section["content"])
 
         if section_size > max_size:
-            if current_chunk:
-                result.append(current_chunk)
-                current_chunk = None
-                current_size = 0
-            sub_sections = force_split(section["content"], section["title"], max_size)
-            result.extend(sub_sections)
+            if contents:
+                yield make_chunk(titles, contents)
+                titles, contents, current_size = [], [], 0
+            for sub_section in force_split(section["content"], section["title"], max_size, measure):
+                yield finish(sub_section)
+        elif contents and current_size + section_size <= max_size:
+            titles.append(section["title"])
+            contents.append(section["content"])
+            current_size += section_size
+        else:
+            if contents:
+                yield make_chunk(titles, contents)
+            titles, contents, current_size = [section["title"]], [section["content"]], section_size
+
+    if contents:
+        yield make_chunk(titles, contents)
+
+
+def source_span(path: str, offset: int, content: bytes) -> dict:
+    """
+    Manifest record locating one source's content in a bundle file
+
+    The content starts right after its "<!-- Source: path -->" line, at byte
+    offset, so it can be sliced out (and checked against sha256) without
+    scanning the bundle.
+    """
+    return {
+        "path": path,
+        "offset": offset,
+        "length": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+    }
+
+
+def write_chunk_bundle(temp_dir: Path, bundle_name: str, src: str, chunk_index: int, chunk: dict) -> dict:
+    """Write one chunk of a split large file and return its manifest entry"""
+    bundle_path = temp_dir / f"{bundle_name}.md"
+    header = f"# Bundle: {bundle_name}\n\n<!-- Source: {src} -->\n".encode("utf-8")
+    content = chunk["content"].encode("utf-8")
+    with open(bundle_path, "wb") as outfile:
+        outfile.write(header)
+        outfile.write(content)
+
+    return {
+        "bundle_file": str(bundle_path.relative_to(temp_dir)),
+        "name": bundle_name,
+        "file_count": 1,
+        "total_size_bytes": chunk["size"],
+        "total_size_kb": round(chunk["size"] / 1024, 2),
+        "is_large_file": True,
+        "source_files": [f"{src}#{chunk_index}"],
+        "sources": [source_span(src, len(header), content)],
+        "chunk_index": chunk_index,
+    }
+
+
+def write_files_bundle(temp_dir: Path, bundle_name: str, file_paths: list[Path], total_size: int,
+                       dir_name: str, project_root: Path) -> dict:
+    """Write a bundle of small files (read one at a time) and return its manifest entry"""
+    bundle_path = temp_dir / f"{bundle_name}.md"
+    manifest_entry = {
+        "bundle_file": str(bundle_path.relative_to(temp_dir)),
+        "name": bundle_name,
+        "file_count": len(file_paths),
+        "total_size_bytes": total_size,
+        "total_size_kb": round(total_size / 1024, 2),
+        "is_large_file": False,
+        "source_files": [],
+        "sources": [],
+        "original_dir": dir_name,
+    }
+
+    # Written as bytes so that the offsets recorded in "sources" are exact
+    with open(bundle_path, "wb") as outfile:
+        offset = outfile.write(f"# Bundle: {bundle_name}\n".encode("utf-8"))
+        for fp in file_paths:
+            # 计算相对于项目根目录的路径（保留软链接）
+            rel_path_from_project = fp.relative_to(project_root)
+            manifest_entry["source_files"].append(str(rel_path_from_project))
+            try:
+                content = fp.read_text(encoding="utf-8").encode("utf-8")
+                offset += outfile.write(f"\n<!-- Source: {rel_path_from_project} -->\n".encode("utf-8"))
+                manifest_entry["sources"].append(source_span(str(rel_path_from_project), offset, content))
+                offset += outfile.write(content)
+            except Exception as e:
+                print(f"Error reading {fp}: {e}")
+
+    return manifest_entry
+
+
+def bundle_large_files(fps: list[Path], project_root: Path, temp_dir: Path, max_size: int,
+                       measure: Callable[[str], int] = byte_size) -> list[list[dict]]:
+    """
+    Split large files and write their chunk bundles, returning manifest entries per file
+
+    Files sharing a stem produce the same bundle names, so they are handled
+    together, in order, by one task.
+    """
+    results = []
+    for fp in fps:
+        # 计算相对于项目根目录的路径（保留软链接）
+        rel_path_from_project = fp.relative_to(project_root)
+        entries = []
+        for i, chunk in enumerate(iter_large_file_chunks(fp, max_size, measure)):
+            chunk_name = f"{rel_path_from_project.stem}_part{i+1:02d}"
+            entry = write_chunk_bundle(temp_dir, chunk_name, str(rel_path_from_project), i + 1, chunk)
+            if "tokens" in chunk:
+                entry["estimated_tokens"] = chunk["tokens"]
+            entries.append(entry)
+        for entry in entries:
+            entry["chunk_total"] = len(entries)
+        results.append(entries)
+    return results
+
+
+def pack_first_fit_decreasing(items: list[tuple], max_size: int) -> list[list]:
+    """
+    First-fit-decreasing bin packing
+
+    Args:
+        items: (weight, sort_key, files); sort_key breaks weight ties deterministically
+
+    Returns:
+        list of [load, files] bins, in creation order
+    """
+    bins = []
+    for weight, _, files in sorted(items, key=lambda item: (-item[0], item[1])):
+        for bin_ in bins:
+            if bin_[0] + weight <= max_size:
+                bin_[0] += weight
+                bin_[1].extend(files)
+                break
         else:
-            if current_chunk and (current_size + section_size <= max_size):
-                current_chunk["content"] += "\n\n" + section["content"]
-                current_chunk["title"] += " + " + section["title"]
-                current_size += section_size
+            bins.append([weight, list(files)])
+    return bins
+
+
+def plan_small_bundles(small_files: list[tuple[Path, int, int]], project_root: Path, max_size: int,
+                       meta_per_file: int = 200, packing: str = "ffd", source_root: Path = None) -> list[tuple]:
+    """
+    Group small files by directory into bundles without reading them
+
+    packing="sequential" fills bundles greedily in path order within each directory.
+    packing="ffd" packs each directory first-fit-decreasing; bundles at most half
+    full are handed up to the parent directory (up to source_root) and packed
+    again with its files, so directories only share a bundle when neither
+    could fill one. First-fit leaves at most one such bundle per directory.
+
+    Args:
+        small_files: (path, size in bytes, size in the bundling unit)
+        max_size / meta_per_file: in the bundling unit (bytes or estimated tokens)
+        source_root: input directory relative to project_root (ffd only)
+
+    Returns:
+        list of (bundle_name, files, total_size_bytes, dir_name), in manifest order
+    """
+    dir_groups = {}
+    for fp, fp_bytes, fp_size in small_files:
+        # 计算相对于项目根目录的路径（保留软链接）
+        rel_path_from_project = fp.relative_to(project_root)
+        dir_groups.setdefault(rel_path_from_project.parent, []).append((fp, fp_bytes, fp_size))
+
+    def dir_label(rel_dir: Path) -> str:
+        return str(rel_dir) if rel_dir != Path(".") else "_root"
+
+    plans = []
+    bundle_counter = {}
+
+    def add_plan(dir_name: str, files: list[Path], total_size: int):
+        base_name = dir_name.replace("/", "_").replace("\\", "_")
+        bundle_counter[base_name] = bundle_counter.get(base_name, 0) + 1
+        bundle_name = f"{base_name}_part{bundle_counter[base_name]:02d}"
+        plans.append((bundle_name, files, total_size, dir_name))
+
+    if packing == "sequential":
+        for dir_name, files in sorted((dir_label(d), files) for d, files in dir_groups.items()):
+            current_bundle = []
+            current_size = 0
+            current_bytes = 0
+
+            for fp, fp_bytes, fp_size in sorted(files):
+                meta_size = get_bundle_meta_size(len(current_bundle) + 1, meta_per_file)
+
+                if current_bundle and (current_size + fp_size + meta_size > max_size):
+                    add_plan(dir_name, current_bundle, current_bytes)
+                    current_bundle = [fp]
+                    current_size = fp_size
+                    current_bytes = fp_bytes
+                else:
+                    current_bundle.append(fp)
+                    current_size += fp_size
+                    current_bytes += fp_bytes
+
+            if current_bundle:
+                add_plan(dir_name, current_bundle, current_bytes)
+
+        return plans
+
+    # Every directory between the files and source_root is a packing level
+    top = source_root if source_root is not None else Path(".")
+    levels = set()
+    for rel_dir in dir_groups:
+        while rel_dir not in levels:
+            levels.add(rel_dir)
+            if rel_dir == top or rel_dir == Path("."):
+                break
+            rel_dir = rel_dir.parent
+
+    handed_up = {}
+    finished = []  # (dir_name, sorted files with byte sizes)
+    # Deepest directories first, so children are packed before their parent
+    for rel_dir in sorted(levels, key=lambda d: (-len(d.parts), str(d))):
+        items = [(fp_size + meta_per_file, str(fp), [(fp, fp_bytes)])
+                 for fp, fp_bytes, fp_size in dir_groups.get(rel_dir, [])]
+        items.extend(handed_up.pop(rel_dir, []))
+        is_top = rel_dir == top or rel_dir == Path(".")
+        for load, files in pack_first_fit_decreasing(items, max_size):
+            files.sort(key=lambda item: str(item[0]))
+            if is_top or load * 2 > max_size:
+                finished.append((dir_label(rel_dir), files))
             else:
-                if current_chunk:
-                    result.append(current_chunk)
-                current_chunk = {
-                    "title": section["title"],
-                    "content": section["content"],
-                    "size": section_size
-                }
-                current_size = section_size
-
-    if current_chunk:
-        result.append(current_chunk)
-
-    for chunk in result:
-        chunk["size"] = len(chunk["content"].encode("utf-8"))
+                handed_up.setdefault(rel_dir.parent, []).append((load, str(files[0][0]), files))
+
+    for dir_name, files in sorted(finished, key=lambda bundle: (bundle[0], str(bundle[1][0][0]))):
+        add_plan(dir_name, [fp for fp, _ in files], sum(fp_bytes for _, fp_bytes in files))
+
+    return plans
+
+
+def write_planned_bundle(plan: tuple, temp_dir: Path, project_root: Path) -> dict:
+    """Write one bundle from plan_small_bundles"""
+    bundle_name, files, total_size, dir_name = plan
+    return write_files_bundle(temp_dir, bundle_name, files, total_size, dir_name, project_root)
 
-    return result
 
+def file_sha256(fp: Path) -> str:
+    """SHA-256 of a file's bytes, read in blocks"""
+    hasher = hashlib.sha256()
+    with open(fp, "rb") as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def hash_and_measure(fp: Path, size_bytes: int, measure: Callable[[str], int], limit: int) -> tuple[str, int]:
+    """
+    SHA-256 of a file plus its size in the bundling unit, from a single read
+
+    In token mode, files too big to fit limit at MAX_BYTES_PER_TOKEN are not
+    decoded; their size is reported as limit + 1 so they are always split.
+    """
+    if measure is byte_size:
+        return file_sha256(fp), size_bytes
+    if size_bytes > limit * MAX_BYTES_PER_TOKEN:
+        return file_sha256(fp), limit + 1
+    data = fp.read_bytes()
+    return hashlib.sha256(data).hexdigest(), measure(data.decode("utf-8", errors="replace"))
 
-def bundle_files(source_dir: str, output_dir: str, max_size_kb: int) -> dict:
+
+def minhash_signature(fp: Path) -> Optional[tuple[int, ...]]:
+    """
+    MinHash signature of a file's word shingles, or None if it has no words
+
+    One permutation hashing: each shingle is hashed once, its low bits pick one
+    of MINHASH_BINS bins and the bin keeps the smallest remaining bits. Empty
+    bins borrow the next non-empty bin, offset by the distance to it.
+    """
+    tokens = SHINGLE_TOKEN_PATTERN.findall(fp.read_text(encoding="utf-8", errors="replace").lower())
+    if not tokens:
+        return None
+    shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))}
+
+    bins = [None] * MINHASH_BINS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        index, value = h % MINHASH_BINS, h // MINHASH_BINS
+        if bins[index] is None or value < bins[index]:
+            bins[index] = value
+
+    signature = list(bins)
+    for i in range(MINHASH_BINS):
+        distance = 0
+        while bins[(i + distance) % MINHASH_BINS] is None:
+            distance += 1
+        signature[i] = bins[(i + distance) % MINHASH_BINS] + (distance << 58)
+    return tuple(signature)
+
+
+def find_near_duplicates(signatures: dict[str, Optional[tuple]], order: list[str],
+                         threshold: float) -> dict[str, list[str]]:
+    """
+    Cluster near-duplicate files by MinHash signature
+
+    LSH banding: only files whose signatures agree on every bin of some band
+    are compared, so the cost grows with the number of files, not pairs.
+    Files are taken in order; each file not yet clustered becomes a
+    representative and takes every unclustered candidate whose estimated
+    Jaccard similarity to it reaches threshold.
+
+    Args:
+        signatures: path -> signature (None is never clustered)
+        order: paths, preferred representatives first
+
+    Returns:
+        representative -> aliases (in order), for clusters with aliases only
+    """
+    rows = MINHASH_BINS // LSH_BANDS
+    rank = {path: i for i, path in enumerate(order)}
+    buckets = {}
+    for path in order:
+        signature = signatures.get(path)
+        if signature is not None:
+            for band in range(LSH_BANDS):
+                buckets.setdefault((band,) + signature[band * rows:(band + 1) * rows], []).append(path)
+
+    clustered = set()
+    clusters = {}
+    for path in order:
+        signature = signatures.get(path)
+        if signature is None or path in clustered:
+            continue
+        clustered.add(path)
+        compared = set()
+        aliases = []
+        for band in range(LSH_BANDS):
+            for other in buckets[(band,) + signature[band * rows:(band + 1) * rows]]:
+                if other in clustered or other in compared:
+                    continue
+                compared.add(other)
+                matches = sum(a == b for a, b in zip(signature, signatures[other]))
+                if matches >= threshold * MINHASH_BINS:
+                    clustered.add(other)
+                    aliases.append(other)
+        if aliases:
+            clusters[path] = sorted(aliases, key=rank.get)
+    return clusters
+
+
+def load_previous_manifest(manifest_path: Path) -> list[dict]:
+    """Manifest of the previous run, or [] if missing or unreadable"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return manifest if isinstance(manifest, list) else []
+
+
+def compressed_output_path(temp_dir: Path, bundle_name: str) -> Path:
+    """Where the sub-agent writes a bundle's compressed output (as read by merge_refs.py)"""
+    return temp_dir / "compressed" / f"{bundle_name}_compressed.md"
+
+
+def bundle_files(source_dir: str, output_dir: str, max_size_kb: int, jobs: int = 1,
+                 full: bool = False, max_tokens: int = None,
+                 token_counter: Callable[[str], int] = estimate_token_count, packing: str = "ffd",
+                 dedup: bool = False, dedup_threshold: float = DEFAULT_DEDUP_THRESHOLD) -> dict:
     """
     Main function for intelligent document chunking
 
+    With max_tokens, bundles are sized in estimated tokens (token_counter,
+    merge_refs.estimate_token_count by default) instead of max_size_kb bytes.
+    token_counter must be a module-level function when jobs > 1.
+
+    With jobs > 1, large files are split and bundles written in a process pool;
+    bundle names and manifest order are the same as with jobs = 1.
+
+    Incremental by default: manifest entries record the SHA-256 of their source
+    files, and a bundle whose sources (and chunk size limit) are unchanged since
+    the previous run is kept together with its compressed/ output. Rebuilt and
+    removed bundles lose their compressed output. full=True rebuilds everything.
+
+    With dedup, files whose estimated similarity (MinHash Jaccard over word
+    shingles) to a larger file reaches dedup_threshold are not bundled; the
+    manifest entry holding that representative lists them under "aliases".
+
     Returns:
         dict: Contains manifest and temp_dir paths
     """
@@ -238,8 +916,14 @@ def bundle_files(source_dir: str, output_dir: str, max_size_kb: int) -> dict:
     # 解析路径，保留软链接形式
     source_path, user_input_base = resolve_symlink_preserved(source_dir, project_root)
     output_path = Path(output_dir)
-    max_size = max_size_kb * 1024
-    max_size_with_meta = int(max_size_kb * 1024 * 0.9)
+    if max_tokens:
+        measure, size_unit, limit_label = token_counter, "tokens", f"{max_tokens} tokens"
+        max_size_with_meta = int(max_tokens * 0.9)
+        meta_per_file = TOKEN_META_SIZE_PER_FILE
+    else:
+        measure, size_unit, limit_label = byte_size, "bytes", f"{max_size_kb}K"
+        max_size_with_meta = int(max_size_kb * 1024 * 0.9)
+        meta_per_file = get_bundle_meta_size(1)
 
     print(f"Source path (symlink preserved): {source_path}")
     print(f"User input base: {user_input_base}")
@@ -252,156 +936,180 @@ def bundle_files(source_dir: str, output_dir: str, max_size_kb: int) -> dict:
 
     # Create temp directory under output directory
     temp_dir = output_path / ".bundles_temp"
-    if temp_dir.exists():
+    manifest_path = temp_dir / "manifest.json"
+    previous = [] if full else load_previous_manifest(manifest_path)
+    if full and temp_dir.exists():
         shutil.rmtree(temp_dir)
     temp_dir.mkdir(parents=True, exist_ok=True)
 
-    # Collect all Markdown files
-    all_files = []
-    for root, dirs, files in os.walk(source_path):
-        root_path = Path(root)
-        if "assets" in root_path.parts or "images" in root_path.parts:
-            continue
-        for file in files:
-            if file.endswith(".md") or file.endswith(".mdx"):
-                fp = root_path / file
-                all_files.append(fp)
+    # Collect all Markdown files as (path, size)
+    all_files = scan_markdown_files(source_path)
 
     print(f"Found {len(all_files)} Markdown files")
 
-    # Separate large and small files
-    large_files = [f for f in all_files if get_file_size(f) > max_size_with_meta]
-    small_files = [f for f in all_files if get_file_size(f) <= max_size_with_meta]
+    # Previous entries: chunks by source file, small-file bundles by name
+    previous_chunks = {}
+    previous_bundles = {}
+    for entry in previous:
+        if entry.get("is_large_file"):
+            src = entry["source_files"][0].rsplit("#", 1)[0]
+            previous_chunks.setdefault(src, []).append(entry)
+        else:
+            previous_bundles[entry["name"]] = entry
 
-    print(f"Large files (>{max_size_kb}K): {len(large_files)}")
-    print(f"Small files (<={max_size_kb}K): {len(small_files)}")
+    def is_unchanged(entry: dict, hashes: dict) -> bool:
+        # Entries from before "sources" was recorded are rebuilt once
+        return (entry.get("source_hashes") == hashes and "sources" in entry and
+                (temp_dir / entry["bundle_file"]).exists())
 
-    bundles = []
+    parallel = jobs > 1 and len(all_files) > 1
+    if parallel:
+        print(f"Using {jobs} worker processes")
 
-    # Process large files: split by headings
-    for fp in large_files:
-        # 计算相对于项目根目录的路径（保留软链接）
-        rel_path_from_project = fp.relative_to(project_root)
-        chunks = split_large_file_by_headings(fp, rel_path_from_project, max_size_with_meta)
+    with (ProcessPoolExecutor(max_workers=jobs) if parallel else nullcontext()) as executor:
+        def run(func, *iterables, chunksize: int = 1) -> list:
+            if executor is None:
+                return list(map(func, *iterables))
+            return list(executor.map(func, *iterables, chunksize=chunksize))
 
-        for i, chunk in enumerate(chunks):
-            chunk_name = f"{rel_path_from_project.stem}_part{i+1:02d}"
-            bundles.append({
-                "name": chunk_name,
-                "files": [],
-                "total_size": chunk["size"],
-                "is_large": True,
-                "original_path": str(rel_path_from_project),
-                "is_split": True,
-                "chunk_title": chunk["title"],
-                "chunk_content": chunk["content"],
-                "chunk_index": i + 1,
-                "chunk_total": len(chunks)
-            })
-        print(f"  {rel_path_from_project} -> {len(chunks)} parts")
-
-    # Process small files: group by directory
-    dir_groups = {}
-    for fp in small_files:
         # 计算相对于项目根目录的路径（保留软链接）
-        rel_path_from_project = fp.relative_to(project_root)
-        parent = str(rel_path_from_project.parent) if rel_path_from_project.parent != Path(".") else "_root"
-        if parent not in dir_groups:
-            dir_groups[parent] = []
-        dir_groups[parent].append(fp)
-
-    bundle_counter = {}
-    for dir_name, files in sorted(dir_groups.items()):
-        current_bundle = []
-        current_size = 0
-
-        for fp in sorted(files):
-            fp_size = get_file_size(fp)
-            meta_size = get_bundle_meta_size(len(current_bundle) + 1)
-
-            if current_bundle and (current_size + fp_size + meta_size > max_size_with_meta):
-                base_name = dir_name.replace("/", "_").replace("\\", "_")
-                bundle_counter[base_name] = bundle_counter.get(base_name, 0) + 1
-                bundle_name = f"{base_name}_part{bundle_counter[base_name]:02d}"
-
-                bundles.append({
-                    "name": bundle_name,
-                    "files": current_bundle.copy(),
-                    "total_size": current_size,
-                    "is_large": False,
-                    "original_dir": dir_name
-                })
-
-                current_bundle = [fp]
-                current_size = fp_size
+        rel_paths = {fp: str(fp.relative_to(project_root)) for fp, _ in all_files}
+        all_paths = [fp for fp, _ in all_files]
+        hashes = {}
+        sizes = {}
+        for (fp, fp_size), (file_hash, size) in zip(all_files, run(
+                hash_and_measure, all_paths, [fp_size for _, fp_size in all_files], repeat(measure),
+                repeat(max_size_with_meta), chunksize=max(1, len(all_paths) // (jobs * 8)))):
+            hashes[fp] = file_hash
+            sizes[fp] = size
+
+        aliases = {}
+        if dedup:
+            signatures = dict(zip((rel_paths[fp] for fp in all_paths), run(
+                minhash_signature, all_paths, chunksize=max(1, len(all_paths) // (jobs * 8)))))
+            # Largest file of each cluster is bundled
+            order = [rel_paths[fp] for fp, _ in sorted(all_files, key=lambda item: (-item[1], rel_paths[item[0]]))]
+            aliases = find_near_duplicates(signatures, order, dedup_threshold)
+            duplicates = {alias for group in aliases.values() for alias in group}
+            all_files = [(fp, fp_size) for fp, fp_size in all_files if rel_paths[fp] not in duplicates]
+            print(f"Near-duplicate files skipped: {len(duplicates)} (aliases of {len(aliases)} files)")
+
+        # Separate large and small files
+        large_files = []
+        small_files = []
+        for fp, fp_size in all_files:
+            if sizes[fp] > max_size_with_meta:
+                large_files.append((fp, fp_size))
             else:
-                current_bundle.append(fp)
-                current_size += fp_size
-
-        if current_bundle:
-            base_name = dir_name.replace("/", "_").replace("\\", "_")
-            bundle_counter[base_name] = bundle_counter.get(base_name, 0) + 1
-            bundle_name = f"{base_name}_part{bundle_counter[base_name]:02d}"
-
-            bundles.append({
-                "name": bundle_name,
-                "files": current_bundle.copy(),
-                "total_size": current_size,
-                "is_large": False,
-                "original_dir": dir_name
-            })
-
-    # Create bundle files (in temp directory)
-    manifest = []
-    for bundle_info in bundles:
-        bundle_name = bundle_info["name"]
-        file_paths = bundle_info["files"]
-        bundle_path = temp_dir / f"{bundle_name}.md"
-
-        manifest_entry = {
-            "bundle_file": str(bundle_path.relative_to(temp_dir)),
-            "name": bundle_name,
-            "file_count": len(file_paths) if not bundle_info.get("is_split") else 1,
-            "total_size_bytes": bundle_info["total_size"],
-            "total_size_kb": round(bundle_info["total_size"] / 1024, 2),
-            "is_large_file": bundle_info.get("is_large", False),
-            "source_files": []
-        }
-
-        with open(bundle_path, "w", encoding="utf-8") as outfile:
-            outfile.write(f"# Bundle: {bundle_name}\n")
+                small_files.append((fp, fp_size, sizes[fp]))
+
+        print(f"Large files (>{limit_label}): {len(large_files)}")
+        print(f"Small files (<={limit_label}): {len(small_files)}")
+
+        # Large files sharing a stem write to the same bundle names: keep them in one task
+        stem_groups = {}
+        for fp, _ in large_files:
+            stem_groups.setdefault(fp.stem, []).append(fp)
+
+        large_entries = {}
+        large_tasks = []
+        for fps in stem_groups.values():
+            reused = {}
+            for fp in fps:
+                entries = sorted(previous_chunks.get(rel_paths[fp], []), key=lambda e: e["chunk_index"])
+                if (entries and len(entries) == entries[0]["chunk_total"] and
+                        all(is_unchanged(e, {rel_paths[fp]: hashes[fp]}) and
+                            e.get("chunk_max_size") == max_size_with_meta and
+                            e.get("size_unit", "bytes") == size_unit for e in entries)):
+                    reused[fp] = entries
+            if len(reused) == len(fps):
+                large_entries.update(reused)
+            else:
+                large_tasks.append(fps)
+
+        small_plans = plan_small_bundles(small_files, project_root, max_size_with_meta, meta_per_file,
+                                         packing, source_path.relative_to(project_root))
+        small_entries = []
+        small_tasks = []
+        for plan in small_plans:
+            bundle_name, files, _, _ = plan
+            previous_entry = previous_bundles.get(bundle_name)
+            bundle_hashes = {rel_paths[fp]: hashes[fp] for fp in files}
+            if (previous_entry and previous_entry["source_files"] == list(bundle_hashes) and
+                    is_unchanged(previous_entry, bundle_hashes)):
+                small_entries.append(previous_entry)
+            else:
+                small_entries.append(None)
+                small_tasks.append(plan)
+
+        # Large files first (as in the serial order), so colliding names end up the same
+        large_results = run(bundle_large_files, large_tasks, repeat(project_root), repeat(temp_dir),
+                            repeat(max_size_with_meta), repeat(measure))
+        written = run(write_planned_bundle, small_tasks, repeat(temp_dir), repeat(project_root),
+                      chunksize=max(1, len(small_tasks) // (jobs * 8)))
+
+    written_names = set()
+    for fps, results in zip(large_tasks, large_results):
+        for fp, entries in zip(fps, results):
+            for entry in entries:
+                entry["source_hashes"] = {rel_paths[fp]: hashes[fp]}
+                entry["chunk_max_size"] = max_size_with_meta
+                if size_unit != "bytes":
+                    entry["size_unit"] = size_unit
+                written_names.add(entry["name"])
+            large_entries[fp] = entries
+
+    hashes_by_rel = {rel_paths[fp]: file_hash for fp, file_hash in hashes.items()}
+    sizes_by_rel = {rel_paths[fp]: size for fp, size in sizes.items()}
+    written = iter(written)
+    for i, entry in enumerate(small_entries):
+        if entry is None:
+            entry = small_entries[i] = next(written)
+            entry["source_hashes"] = {src: hashes_by_rel[src] for src in entry["source_files"]}
+            written_names.add(entry["name"])
+        if size_unit == "bytes":
+            entry.pop("estimated_tokens", None)
+        else:
+            entry["estimated_tokens"] = sum(sizes_by_rel[src] for src in entry["source_files"])
 
-            if bundle_info.get("is_large") and bundle_info.get("is_split"):
-                src = bundle_info['original_path']
-                idx = bundle_info['chunk_index']
-                total = bundle_info['chunk_total']
-                outfile.write(f"\n<!-- Source: {src} -->\n")
-                outfile.write(bundle_info["chunk_content"])
+    # Manifest order follows the scan order of large files, then the small-file plan
+    manifest = []
+    for fp, _ in large_files:
+        entries = large_entries[fp]
+        manifest.extend(entries)
+        print(f"  {rel_paths[fp]} -> {len(entries)} parts")
+    manifest.extend(small_entries)
+
+    # Aliases are refreshed on reused entries too: they do not change bundle content
+    for entry in manifest:
+        entry_aliases = {}
+        for src in entry["source_files"]:
+            src = src.rsplit("#", 1)[0] if entry.get("is_large_file") else src
+            if src in aliases:
+                entry_aliases[src] = aliases[src]
+        if entry_aliases:
+            entry["aliases"] = entry_aliases
+        else:
+            entry.pop("aliases", None)
 
-                manifest_entry["chunk_index"] = idx
-                manifest_entry["chunk_total"] = total
-                manifest_entry["source_files"].append(f"{src}#{idx}")
-            else:
-                manifest_entry["original_dir"] = bundle_info.get("original_dir", "")
-                for fp in file_paths:
-                    # 计算相对于项目根目录的路径（保留软链接）
-                    rel_path_from_project = fp.relative_to(project_root)
-                    manifest_entry["source_files"].append(str(rel_path_from_project))
-                    try:
-                        content = fp.read_text(encoding="utf-8")
-                        outfile.write(f"\n<!-- Source: {rel_path_from_project} -->\n")
-                        outfile.write(content)
-                    except Exception as e:
-                        print(f"Error reading {fp}: {e}")
-
-        manifest.append(manifest_entry)
+    # Compressed outputs of rebuilt bundles are stale; removed bundles lose both files
+    current_names = {entry["name"] for entry in manifest}
+    for entry in previous:
+        if entry["name"] in written_names or entry["name"] not in current_names:
+            compressed_output_path(temp_dir, entry["name"]).unlink(missing_ok=True)
+        if entry["name"] not in current_names:
+            (temp_dir / entry["bundle_file"]).unlink(missing_ok=True)
 
     # Save manifest
-    manifest_path = temp_dir / "manifest.json"
     with open(manifest_path, "w", encoding="utf-8") as f:
         json.dump(manifest, f, indent=2, ensure_ascii=False)
 
-    print(f"\nDone! Created {len(bundles)} bundles")
+    pending = [entry["name"] for entry in manifest
+               if not compressed_output_path(temp_dir, entry["name"]).exists()]
+
+    print(f"\nDone! {len(manifest)} bundles ({len(written_names)} written, "
+          f"{len(manifest) - len(written_names)} unchanged)")
+    print(f"Bundles without compressed output: {len(pending)}")
     print(f"Temp directory: {temp_dir}")
     print(f"Manifest: {manifest_path}")
 
@@ -409,7 +1117,10 @@ def bundle_files(source_dir: str, output_dir: str, max_size_kb: int) -> dict:
         "manifest": manifest,
         "temp_dir": str(temp_dir),
         "manifest_path": str(manifest_path),
-        "bundle_count": len(bundles)
+        "bundle_count": len(manifest),
+        "written_count": len(written_names),
+        "pending_compression": pending,
+        "aliases": aliases
     }
 
 
@@ -436,9 +1147,46 @@ def main():
         default=40,
         help="Max file size in KB (default: 40KB)"
     )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Size bundles by estimated tokens (merge_refs estimator) instead of --max-size"
+    )
+    parser.add_argument(
+        "--packing",
+        choices=["ffd", "sequential"],
+        default="ffd",
+        help="How small files are grouped: ffd = fewest bundles, merging directories that "
+             "cannot fill one; sequential = fill in path order per directory (default: ffd)"
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Bundle one file per cluster of near-duplicate files; the others are listed as aliases in the manifest"
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_DEDUP_THRESHOLD,
+        help=f"Estimated similarity (0-1) from which files count as near-duplicates (default: {DEFAULT_DEDUP_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for splitting and writing bundles (0 = all CPU cores, default: 1)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Delete .bundles_temp and rebuild every bundle instead of only changed ones"
+    )
 
     args = parser.parse_args()
-    bundle_files(args.input, args.output, args.max_size)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    bundle_files(args.input, args.output, args.max_size, jobs=jobs, full=args.full,
+                 max_tokens=args.max_tokens, packing=args.packing, dedup=args.dedup,
+                 dedup_threshold=args.dedup_threshold)
 
 
 if __name__ == "__main__":
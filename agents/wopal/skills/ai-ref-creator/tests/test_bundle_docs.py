@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/bundle_docs.py
+
+Run:
+    python -m unittest discover -s agents/wopal/skills/ai-ref-creator/tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from bundle_docs import iter_large_file_chunks, next_fence  # noqa: E402
+from merge_refs import estimate_token_count  # noqa: E402
+
+
+def open_fence_after(text):
+    fence = None
+    for line in text.split("\n"):
+        fence = next_fence(line, fence)
+    return fence
+
+
+class TokenBudgetFencedBlockTest(unittest.TestCase):
+    """A fenced block split in --max-tokens mode: closing it must not push a part over budget"""
+
+    MAX_TOKENS = 2000
+
+    def setUp(self):
+        body = "\n".join(f"    result_{i} = compute(value_{i}, factor={i}) + offset  # step {i}"
+                         for i in range(6000))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "large.md"
+        self.path.write_text(f"# Title\n\nIntro text.\n\n```python\n{body}\n```\n\nAfter the block.\n",
+                             encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_part_within_max_tokens(self):
+        parts = list(iter_large_file_chunks(self.path, self.MAX_TOKENS, estimate_token_count))
+        self.assertGreater(len(parts), 1)
+        for part in parts:
+            self.assertLessEqual(estimate_token_count(part["content"]), self.MAX_TOKENS)
+
+    def test_every_part_closes_its_fence(self):
+        parts = list(iter_large_file_chunks(self.path, self.MAX_TOKENS, estimate_token_count))
+        for part in parts:
+            self.assertIsNone(open_fence_after(part["content"]))
+
+    def test_no_code_line_lost(self):
+        parts = list(iter_large_file_chunks(self.path, self.MAX_TOKENS, estimate_token_count))
+        joined = "\n".join(part["content"] for part in parts)
+        for i in (0, 2999, 5999):
+            self.assertIn(f"result_{i} = compute(value_{i}, factor={i})", joined)
+
+
+if __name__ == "__main__":
+    unittest.main()
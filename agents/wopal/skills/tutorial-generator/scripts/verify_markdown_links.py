@@ -7,21 +7,43 @@ It checks for:
 - Broken file paths (relative and absolute within the project)
 - Broken anchors (headers within files)
 
-It supports an `--auto-fix` mode to attempt to resolve broken file links by searching
-for a unique file with the same name in the scanned directory tree.
+It supports an `--auto-fix` mode to attempt to resolve broken file links by ranking
+candidate files in the scanned tree (same name, same stem, or a one-character typo)
+by shared path suffix and directory proximity.
+
+Header anchors are slugged the same way GitHub does (including -1, -2 suffixes for
+repeated headers). Extracted anchors are persisted in <target_directory>/.anchor-index.json
+keyed by mtime/size and content hash, so repeated runs only re-read changed files.
+
+With `--watch`, the script keeps its indexes in memory after the first scan and, on each
+filesystem change (inotify on Linux, polling elsewhere), re-validates only the changed
+files and the files that link to them.
+
+Links and anchors are parsed by markdown_links.py (a copy of the website-doc-scraper parser), so
+links inside fenced code blocks and inline code, and headers inside fenced code, are ignored.
 
 Usage:
-    python3 verify_markdown_links.py <target_directory> [--fix]
+    python3 verify_markdown_links.py <target_directory> [--fix] [--jobs N] [--no-anchor-index] [--watch]
 """
 
 import os
-import re
+import posixpath
+import json
+import hashlib
 import argparse
 import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import unquote
 
+from markdown_links import iter_links, extract_anchors, INLINE, IMAGE, REFERENCE
+
 # ANSI colors for output
 class Colors:
     HEADER = '\033[95m'
@@ -36,32 +58,288 @@ class Colors:
 def print_color(text, color=Colors.ENDC):
     print(f"{color}{text}{Colors.ENDC}")
 
-# Regex patterns
-# 1. Standard inline links: [text](link) or [text](link "title")
-#    Capture group 2 is the link.
-LINK_PATTERN = re.compile(r'\[([^\]]+)\]\(([^)"]+)(?: \"[^\"]+\")?\)')
-
-# 2. Reference-style links: [text]: link
-#    Capture group 2 is the link.
-REF_LINK_PATTERN = re.compile(r'^\[([^\]]+)\]:\s*(\S+)', re.MULTILINE)
-
-# 3. Header pattern for anchor validation: # Header Text
-#    Matches standard markdown headers.
-HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.*)', re.MULTILINE)
-
-# 4. HTML anchor pattern: <a id="anchor-name"></a> or <div id="anchor-name">
-HTML_ID_PATTERN = re.compile(r'id=["\']([^"\']+)["\']')
+# Links are tokenized by markdown_links (inline links, images and reference
+# definitions, outside code blocks).
+CHECKED_LINK_KINDS = (INLINE, IMAGE, REFERENCE)
+
+# Persistent anchor index (hidden file, so build_index never lists it)
+ANCHOR_INDEX_FILENAME = '.anchor-index.json'
+ANCHOR_INDEX_VERSION = 2
+
+# Auto-fix candidate index
+FILES_KEY = None                # trie node key holding the files below that suffix
+MIN_FUZZY_STEM_LENGTH = 4       # shorter stems are too ambiguous for typo matching
+
+# Below this many stale files, parsing in-process is faster than starting workers
+PARALLEL_PREFETCH_THRESHOLD = 64
+
+
+def _deletion_variants(word):
+    """All strings obtained by deleting exactly one character from word."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def read_anchor_entry(path_str, cached=None):
+    """
+    Returns an anchor index entry {mtime, size, hash, anchors} for a file.
+    If the content hash matches `cached`, its anchors are reused without re-parsing.
+    Module-level so it can run in worker processes.
+    """
+    stat = os.stat(path_str)
+    with open(path_str, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if cached and cached.get('hash') == digest:
+        anchors = cached['anchors']
+    else:
+        anchors = extract_anchors(data.decode('utf-8'))
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'hash': digest, 'anchors': anchors}
+
+
+def _read_anchor_entry_job(job):
+    path_str, cached = job
+    try:
+        return path_str, read_anchor_entry(path_str, cached), None
+    except Exception as e:
+        return path_str, None, str(e)
+
+
+# Watch mode
+WATCH_DEBOUNCE_SECONDS = 0.05
+POLL_INTERVAL_SECONDS = 0.5
+
+
+class InotifyWatcher:
+    """
+    Recursive directory watcher on Linux inotify (via ctypes, no extra dependencies).
+    wait() blocks until something changes and returns the changed absolute paths.
+    After wait(), `overflowed` tells that events were lost (the caller must rescan)
+    and `root_removed` that the watched root itself was deleted.
+    """
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, root_dir):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.root_dir = str(root_dir)
+        self.watches = {}   # { wd: directory_path_str }
+        self.overflowed = False
+        self.root_removed = False
+        self._watch_tree(self.root_dir)
+
+    def _watch_tree(self, top):
+        for root, dirs, _ in os.walk(top):
+            self._add_watch(root)
+
+    def _add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def _drop_watches(self, top):
+        """Stops watching top and every directory below it (the subtree was moved)."""
+        prefix = top + os.sep
+        for wd, directory in list(self.watches.items()):
+            if directory == top or directory.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def _read_events(self, changed):
+        buf = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(buf, offset)
+            offset += self.EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace')
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped: watch directories created meanwhile, the caller rescans
+                self.overflowed = True
+                self._watch_tree(self.root_dir)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_DELETE_SELF:
+                del self.watches[wd]
+                if directory == self.root_dir:
+                    self.root_removed = True
+                continue
+            path = os.path.join(directory, name)
+            changed.add(path)
+            if mask & self.IN_ISDIR and mask & self.IN_MOVED_FROM:
+                # Watches below the old path would keep reporting it: drop them, the
+                # matching IN_MOVED_TO (if moved within the tree) watches the new path
+                self._drop_watches(path)
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                # New subtree: watch it and report what is already inside
+                for root, _, files in os.walk(path):
+                    self._add_watch(root)
+                    changed.update(os.path.join(root, f) for f in files)
+
+    def wait(self):
+        changed = set()
+        self.overflowed = False
+        select.select([self.fd], [], [])
+        self._read_events(changed)
+        # Debounce: editors often write a file in several steps
+        while select.select([self.fd], [], [], WATCH_DEBOUNCE_SECONDS)[0]:
+            self._read_events(changed)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compares (mtime, size) snapshots of the tree."""
+
+    overflowed = False  # polling never loses changes
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.root_removed = False
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for root, dirs, files in os.walk(self.root_dir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self):
+        while True:
+            time.sleep(POLL_INTERVAL_SECONDS)
+            if not os.path.isdir(self.root_dir):
+                self.root_removed = True
+                return set()
+            current = self._snapshot()
+            changed = {p for p in current.keys() | self.snapshot.keys()
+                       if current.get(p) != self.snapshot.get(p)}
+            self.snapshot = current
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(root_dir):
+    """inotify on Linux, polling elsewhere (or if inotify is unavailable)."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root_dir)
+        except (OSError, AttributeError) as e:
+            print_color(f"inotify unavailable ({e}), falling back to polling.", Colors.WARNING)
+    return PollingWatcher(root_dir)
 
 
 class LinkValidator:
-    def __init__(self, root_dir, auto_fix=False):
+    def __init__(self, root_dir, auto_fix=False, jobs=None, use_anchor_index=True):
         self.root_dir = Path(root_dir).resolve()
         self.auto_fix = auto_fix
+        self.jobs = jobs or os.cpu_count() or 1
+        self.use_anchor_index = use_anchor_index
         self.file_index = {}        # { relative_path_str: absolute_Path_obj }
         self.filename_index = defaultdict(list) # { filename: [absolute_Path_objs] }
         self.anchor_cache = {}      # { absolute_path_str: set(anchors) }
+        self.posix_index = {}       # { relative_posix_path: absolute_Path_obj } (non-hidden files)
+        self.path_index = set()     # relative posix paths of every file and directory under root
+        self.symlink_dirs = set()   # relative posix paths of symlinked directories (not walked)
+        self._rel_dir_cache = {}    # { absolute_dir_str: relative_posix_dir }
+        # Auto-fix candidate index (see build_candidate_index)
+        self.suffix_trie = {}       # reversed path components -> {FILES_KEY: [rel_posix], component: {...}}
+        self.stem_index = defaultdict(list)     # { lowercase stem: [rel_posix] }
+        self.deletes_index = defaultdict(set)   # { stem with <=1 char deleted: {lowercase stem} }
+        self.anchor_index = {}      # { relative_path_str: {mtime, size, hash, anchors} } (persisted)
+        self.anchor_index_dirty = False
         self.issues_count = 0
         self.fixed_count = 0
+        # Watch mode only: which sources depend on which target paths (existing or not)
+        self.dependencies = None    # { source_path_str: set(target_path_str) }
+        self.dependents = None      # { target_path_str: set(source_Path_obj) }
+
+    def load_anchor_index(self):
+        """Loads the persisted anchor index from the scan root, if present."""
+        index_path = self.root_dir / ANCHOR_INDEX_FILENAME
+        if not index_path.exists():
+            return
+        try:
+            data = json.loads(index_path.read_text(encoding='utf-8'))
+            if data.get('version') == ANCHOR_INDEX_VERSION:
+                self.anchor_index = data.get('files', {})
+        except Exception as e:
+            print_color(f"Ignoring unreadable anchor index: {e}", Colors.WARNING)
+
+    def save_anchor_index(self):
+        """Persists the anchor index, dropping entries for files that no longer exist."""
+        if not self.anchor_index_dirty:
+            return
+        files = {k: v for k, v in self.anchor_index.items() if k in self.file_index}
+        index_path = self.root_dir / ANCHOR_INDEX_FILENAME
+        tmp_path = index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'version': ANCHOR_INDEX_VERSION, 'files': files}), encoding='utf-8')
+        os.replace(tmp_path, index_path)
+
+    def prefetch_anchors(self):
+        """
+        Phase 2: Anchor prefetch
+        Fills anchor_cache for every Markdown file. Files whose mtime and size match
+        the persisted index are not read at all; stale files are re-read (in parallel
+        when there are many) and only re-parsed if their content hash changed.
+        """
+        stale = []
+        for rel_path, abs_path in self.file_index.items():
+            if abs_path.suffix.lower() != '.md':
+                continue
+            cached = self.anchor_index.get(rel_path)
+            if cached:
+                try:
+                    stat = abs_path.stat()
+                except OSError:
+                    continue
+                if cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                    self.anchor_cache[str(abs_path)] = set(cached['anchors'])
+                    continue
+            stale.append((str(abs_path), cached))
+
+        if not stale:
+            return
+
+        print_color(f"Extracting anchors from {len(stale)} changed Markdown files...", Colors.OKBLUE)
+        if self.jobs > 1 and len(stale) >= PARALLEL_PREFETCH_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                results = list(executor.map(_read_anchor_entry_job, stale,
+                                            chunksize=max(1, len(stale) // (self.jobs * 4))))
+        else:
+            results = [_read_anchor_entry_job(job) for job in stale]
+
+        for path_str, entry, error in results:
+            if error:
+                print_color(f"Error reading file {path_str}: {error}", Colors.WARNING)
+                self.anchor_cache[path_str] = set()
+                continue
+            self.anchor_cache[path_str] = set(entry['anchors'])
+            rel_path = str(Path(path_str).relative_to(self.root_dir))
+            self.anchor_index[rel_path] = entry
+            self.anchor_index_dirty = True
 
     def build_index(self):
         """
@@ -70,18 +348,51 @@ class LinkValidator:
         """
         print_color(f"Building file index for {self.root_dir}...", Colors.OKBLUE)
         count = 0
-        for root, _, files in os.walk(self.root_dir):
+        self.path_index.add('.')
+        for root, dirs, files in os.walk(self.root_dir):
+            rel_root = Path(root).relative_to(self.root_dir)
+            for d in dirs:
+                rel_dir = (rel_root / d).as_posix()
+                self.path_index.add(rel_dir)
+                if os.path.islink(os.path.join(root, d)):
+                    self.symlink_dirs.add(rel_dir)
             for file in files:
+                rel_posix = (rel_root / file).as_posix()
+                self.path_index.add(rel_posix)
                 if file.startswith('.'): continue # Skip hidden files
                 
                 abs_path = Path(root) / file
-                rel_path = abs_path.relative_to(self.root_dir)
+                rel_path = rel_root / file
                 
                 self.file_index[str(rel_path)] = abs_path
                 self.filename_index[file].append(abs_path)
+                self.posix_index[rel_posix] = abs_path
                 count += 1
         
         print_color(f"Indexed {count} files.", Colors.OKGREEN)
+        if self.auto_fix:
+            self.build_candidate_index()
+
+    def build_candidate_index(self):
+        """
+        Builds the lookup structures used by find_fix():
+        - suffix trie over reversed path components (basename first), so the files sharing
+          the longest path suffix with a broken link are found without scanning all
+          same-named files
+        - stem index (name without extension), for links missing or using another extension
+        - single-deletion neighbourhoods of each stem, for one-character typos
+        """
+        for rel_posix in self.posix_index:
+            node = self.suffix_trie
+            for part in reversed(rel_posix.split('/')):
+                node = node.setdefault(part, {})
+                node.setdefault(FILES_KEY, []).append(rel_posix)
+
+            stem = posixpath.splitext(posixpath.basename(rel_posix))[0].lower()
+            self.stem_index[stem].append(rel_posix)
+            if len(stem) >= MIN_FUZZY_STEM_LENGTH:
+                for variant in _deletion_variants(stem):
+                    self.deletes_index[variant].add(stem)
 
     def get_anchors_from_file(self, file_path):
         """
@@ -92,31 +403,56 @@ class LinkValidator:
         if path_str in self.anchor_cache:
             return self.anchor_cache[path_str]
 
-        anchors = set()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # 1. Headers to slug anchors
-            # GitHub/CommonMark slugification: lowercase, remove non-alphanum (keep spaces/hyphens), replace spaces with hyphens
-            for match in HEADER_PATTERN.finditer(content):
-                header_text = match.group(2).strip()
-                # Basic slugification logic (simplified for common cases)
-                slug = header_text.lower()
-                slug = re.sub(r'[^\w\s-]', '', slug) # Remove non-word chars except space and hyphen
-                slug = re.sub(r'\s+', '-', slug)     # Replace space with hyphen
-                anchors.add(slug)
-            
-            # 2. HTML IDs
-            for match in HTML_ID_PATTERN.finditer(content):
-                anchors.add(match.group(1))
-
+            anchors = set(read_anchor_entry(path_str)['anchors'])
         except Exception as e:
             print_color(f"Error reading file {file_path}: {e}", Colors.WARNING)
+            anchors = set()
         
         self.anchor_cache[path_str] = anchors
         return anchors
 
+    def _relative_dir(self, abs_dir):
+        """Root-relative posix path of a directory under root_dir (cached per directory)."""
+        key = str(abs_dir)
+        rel_dir = self._rel_dir_cache.get(key)
+        if rel_dir is None:
+            rel_dir = Path(os.path.relpath(key, self.root_dir)).as_posix()
+            self._rel_dir_cache[key] = rel_dir
+        return rel_dir
+
+    def _is_indexed(self, rel_posix):
+        """
+        True if the index is authoritative for a normalized root-relative posix path:
+        it is under root, not behind a symlinked directory (os.walk does not follow
+        them) and has no hidden component (watch mode does not track hidden paths).
+        """
+        if rel_posix == '..' or rel_posix.startswith('../'):
+            return False
+        parts = rel_posix.split('/')
+        if any(part.startswith('.') for part in parts if part != '.'):
+            return False
+        if self.symlink_dirs:
+            return not any('/'.join(parts[:i]) in self.symlink_dirs for i in range(1, len(parts)))
+        return True
+
+    def _lookup(self, rel_posix):
+        """
+        Returns the absolute Path for a normalized root-relative posix path, or None.
+        """
+        abs_path = self.posix_index.get(rel_posix)
+        if abs_path is not None:
+            return abs_path
+        if rel_posix in self.path_index:
+            return self.root_dir / rel_posix
+        if self._is_indexed(rel_posix):
+            return None
+        # Outside the indexed tree: fall back to the filesystem
+        potential_path = (self.root_dir / rel_posix).resolve()
+        if potential_path.exists():
+            return potential_path
+        return None
+
     def resolve_path(self, link, current_file):
         """
         Resolves a link to an absolute path.
@@ -124,6 +460,10 @@ class LinkValidator:
         - Absolute links (starting with /) -> relative to root_dir? No, usually relative to system root or project root. 
           Here we assume standard relative links mostly.
         - Relative links (../foo/bar.md)
+
+        Resolution is done on normalized posix paths against the index built by
+        build_index(); a miss inside the indexed tree is trusted, and the filesystem
+        is only consulted for targets outside the root or behind symlinked directories.
         """
         # Remove anchor and query params
         path_part = link.split('#')[0].split('?')[0]
@@ -138,34 +478,135 @@ class LinkValidator:
             target_path = current_file
         elif path_part.startswith('/'):
             # Absolute path relative to scan root (common convention in static sites)
-            # Try joining with root_dir
-            potential_path = self.root_dir / path_part.lstrip('/')
-            if potential_path.exists():
-                target_path = potential_path
+            target_path = self._lookup(posixpath.normpath(path_part.lstrip('/') or '.'))
         else:
             # Relative path
-            potential_path = (current_file.parent / path_part).resolve()
-            if potential_path.exists():
-                target_path = potential_path
+            rel_dir = self._relative_dir(current_file.parent)
+            target_path = self._lookup(posixpath.normpath(posixpath.join(rel_dir, path_part)))
             # Check if it was meant to be relative to root (fallback)
-            elif (self.root_dir / path_part).exists():
-                 target_path = self.root_dir / path_part
+            if target_path is None:
+                target_path = self._lookup(posixpath.normpath(path_part))
 
         return target_path, anchor_part, path_part
 
-    def find_fix(self, broken_filename):
+    def find_fix(self, path_part, current_file):
         """
-        Attempts to find a unique file with the same name in the index.
+        Finds the most likely intended target for a broken link.
+
+        Candidates come from the first non-empty tier: same file name, same stem
+        (extension differs or is missing), then stems one edit away. They are ranked by
+        the number of trailing directories shared with the link, a matching (or .md)
+        extension, and directory distance from the linking file. Returns None when
+        nothing matches or the top two candidates tie.
         """
-        candidates = self.filename_index.get(broken_filename)
-        if candidates and len(candidates) == 1:
-            return candidates[0]
-        return None
+        parts = [p for p in path_part.split('/') if p not in ('', '.', '..')]
+        if not parts:
+            return None
+        name = parts[-1]
+        link_dirs = parts[:-1]
+        stem, ext = posixpath.splitext(name)
+        stem = stem.lower()
+
+        # Tier 1: same file name, narrowed to the deepest shared path suffix via the trie
+        candidates = []
+        node = self.suffix_trie.get(name)
+        if node:
+            for part in reversed(link_dirs):
+                child = node.get(part)
+                if not child:
+                    break
+                node = child
+            candidates = node[FILES_KEY]
+
+        # Tier 2: same stem, Tier 3: one-character typo in the stem
+        if not candidates:
+            candidates = self.stem_index.get(stem, [])
+        if not candidates and len(stem) >= MIN_FUZZY_STEM_LENGTH:
+            similar = set(self.deletes_index.get(stem, ()))
+            for variant in _deletion_variants(stem):
+                similar.update(self.deletes_index.get(variant, ()))
+                if variant in self.stem_index:
+                    similar.add(variant)
+            similar.discard(stem)
+            candidates = [c for s in sorted(similar) for c in self.stem_index[s]]
+
+        # Never "fix" a link to point back at the linking file itself
+        source_dirs = [p for p in self._relative_dir(current_file.parent).split('/') if p != '.']
+        current_rel = '/'.join(source_dirs + [current_file.name])
+        candidates = [c for c in candidates if c != current_rel]
+        if not candidates:
+            return None
+
+        ranked = sorted(
+            ((self._fix_score(c, link_dirs, ext, source_dirs), c) for c in candidates),
+            reverse=True,
+        )
+        if len(ranked) > 1 and ranked[0][0] == ranked[1][0]:
+            return None
+        return self.posix_index[ranked[0][1]]
+
+    @staticmethod
+    def _fix_score(candidate, link_dirs, link_ext, source_dirs):
+        cand_parts = candidate.split('/')
+        cand_dirs = cand_parts[:-1]
+
+        shared_suffix = 0
+        for a, b in zip(reversed(link_dirs), reversed(cand_dirs)):
+            if a != b:
+                break
+            shared_suffix += 1
+
+        cand_ext = posixpath.splitext(cand_parts[-1])[1].lower()
+        if cand_ext == link_ext.lower():
+            ext_score = 2
+        elif cand_ext == '.md':
+            ext_score = 1
+        else:
+            ext_score = 0
+
+        common = 0
+        for a, b in zip(source_dirs, cand_dirs):
+            if a != b:
+                break
+            common += 1
+        distance = len(source_dirs) + len(cand_dirs) - 2 * common
+
+        return (shared_suffix, ext_score, -distance)
+
+    def _record_dependency(self, file_path, path_part, target_path):
+        """
+        Remembers that file_path must be re-validated when target_path changes.
+        For broken links, the paths the link could resolve to are recorded instead,
+        so creating the missing file re-validates its sources.
+        """
+        if target_path is not None:
+            keys = [str(target_path)]
+        elif path_part.startswith('/'):
+            keys = [str(self.root_dir / posixpath.normpath(path_part.lstrip('/') or '.'))]
+        else:
+            rel_dir = self._relative_dir(file_path.parent)
+            keys = [
+                str(self.root_dir / posixpath.normpath(posixpath.join(rel_dir, path_part))),
+                str(self.root_dir / posixpath.normpath(path_part)),
+            ]
+        source_key = str(file_path)
+        for key in keys:
+            self.dependencies.setdefault(source_key, set()).add(key)
+            self.dependents.setdefault(key, set()).add(file_path)
+
+    def _forget_dependencies(self, file_path):
+        for key in self.dependencies.pop(str(file_path), ()):
+            sources = self.dependents.get(key)
+            if sources:
+                sources.discard(file_path)
 
     def validate_file(self, file_path):
         """
         Scans a single file for links and validates them.
         """
+        if self.dependencies is not None:
+            self._forget_dependencies(file_path)
+
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -181,20 +622,17 @@ class LinkValidator:
 
         replacements = []
 
-        # Find all links
-        # Combined iterator for both inline and reference links?
-        # Handling them separately for simplicity.
-
-        # 1. Inline links
-        for match in LINK_PATTERN.finditer(content):
-            full_match = match.group(0)
-            link_url = match.group(2)
+        # Find all links (inline, image and reference definitions in one pass)
+        for token in iter_links(content, CHECKED_LINK_KINDS):
+            link_url = token.url
             
-            # Skip external links, mailto, etc.
-            if link_url.startswith(('http://', 'https://', 'mailto:', 'ftp://')):
+            # Skip empty and external links, mailto, etc.
+            if not link_url or link_url.startswith(('http://', 'https://', 'mailto:', 'ftp://')):
                 continue
 
             target_path, anchor, path_part = self.resolve_path(link_url, file_path)
+            if self.dependencies is not None:
+                self._record_dependency(file_path, path_part, target_path)
 
             if target_path:
                 # File exists, check anchor if present
@@ -217,7 +655,7 @@ class LinkValidator:
                 # Attempt Auto-Fix
                 if self.auto_fix and path_part:
                     broken_filename = Path(path_part).name
-                    fix_target = self.find_fix(broken_filename)
+                    fix_target = self.find_fix(path_part, file_path)
                     if fix_target:
                         # Calculate new relative path
                         # os.path.relpath(target, start)
@@ -227,9 +665,8 @@ class LinkValidator:
                         
                         print_color(f"  -> Auto-fixing to: {new_rel_path}", Colors.OKGREEN)
                         
-                        # We need to replace the link part in the match
-                        # match.start(2) is start of link group, match.end(2) is end
-                        replacements.append((match.start(2), match.end(2), new_rel_path))
+                        # Replace only the URL part of the token
+                        replacements.append((token.url_start, token.url_end, new_rel_path))
                         self.fixed_count += 1
                     else:
                         print(f"  -> Could not auto-fix (ambiguous or not found: {broken_filename})")
@@ -246,20 +683,30 @@ class LinkValidator:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write("".join(new_content))
 
-    def run(self):
-        self.build_index()
-        
+    def markdown_files(self):
         scan_files = []
         for root, _, files in os.walk(self.root_dir):
             for file in files:
                 if file.endswith('.md'):
                     scan_files.append(Path(root) / file)
+        return scan_files
+
+    def run(self):
+        self.build_index()
+        if self.use_anchor_index:
+            self.load_anchor_index()
+        self.prefetch_anchors()
+        
+        scan_files = self.markdown_files()
         
         print_color(f"Scanning {len(scan_files)} Markdown files...", Colors.OKBLUE)
         
         for file_path in scan_files:
             self.validate_file(file_path)
         
+        if self.use_anchor_index:
+            self.save_anchor_index()
+
         print("-" * 30)
         if self.issues_count == 0:
              print_color("Traffic Light: GREEN. No broken links found.", Colors.OKGREEN)
@@ -268,10 +715,146 @@ class LinkValidator:
              if self.auto_fix:
                  print_color(f"Auto-fixed {self.fixed_count} links.", Colors.OKGREEN)
 
+    def _index_add(self, abs_path):
+        rel_posix = Path(os.path.relpath(abs_path, self.root_dir)).as_posix()
+        self.path_index.add(rel_posix)
+        # Parent directories created along with the file (misses are trusted in _lookup)
+        parent = posixpath.dirname(rel_posix)
+        while parent and parent not in self.path_index:
+            self.path_index.add(parent)
+            parent = posixpath.dirname(parent)
+        if abs_path.is_symlink() and abs_path.is_dir():
+            self.symlink_dirs.add(rel_posix)
+        if abs_path.is_file() and not abs_path.name.startswith('.') and rel_posix not in self.posix_index:
+            self.file_index[str(Path(rel_posix))] = abs_path
+            self.filename_index[abs_path.name].append(abs_path)
+            self.posix_index[rel_posix] = abs_path
+
+    def _index_remove(self, abs_path):
+        """Removes abs_path and everything indexed below it; returns removed file paths."""
+        rel_posix = Path(os.path.relpath(abs_path, self.root_dir)).as_posix()
+        prefix = rel_posix + '/'
+        removed_paths = [p for p in self.path_index if p == rel_posix or p.startswith(prefix)]
+        removed_files = []
+        for p in removed_paths:
+            self.path_index.discard(p)
+            self.symlink_dirs.discard(p)
+            file_abs = self.posix_index.pop(p, None)
+            if file_abs is not None:
+                self.file_index.pop(str(Path(p)), None)
+                self.filename_index[file_abs.name].remove(file_abs)
+                removed_files.append(file_abs)
+        return removed_files
+
+    def apply_changes(self, changed_paths):
+        """
+        Updates the in-memory indexes for changed paths and returns the Markdown
+        files to re-validate: changed files that still exist plus every file
+        whose links resolve (or would resolve) to a changed path.
+        """
+        affected = set()
+        structure_changed = False
+        for path_str in changed_paths:
+            abs_path = Path(path_str)
+            try:
+                rel_parts = abs_path.relative_to(self.root_dir).parts
+            except ValueError:
+                continue
+            if not rel_parts or any(part.startswith('.') for part in rel_parts):
+                continue  # hidden files (anchor index, editor temp files)
+
+            self.anchor_cache.pop(path_str, None)
+            affected.add(path_str)
+            if abs_path.exists():
+                if '/'.join(rel_parts) not in self.path_index:
+                    structure_changed = True
+                self._index_add(abs_path)
+            else:
+                for removed in self._index_remove(abs_path):
+                    self.anchor_cache.pop(str(removed), None)
+                    affected.add(str(removed))
+                structure_changed = True
+
+        if structure_changed and self.auto_fix:
+            self.suffix_trie = {}
+            self.stem_index = defaultdict(list)
+            self.deletes_index = defaultdict(set)
+            self.build_candidate_index()
+
+        to_validate = set()
+        for path_str in affected:
+            abs_path = Path(path_str)
+            if abs_path.suffix.lower() == '.md' and abs_path.is_file():
+                to_validate.add(abs_path)
+            to_validate.update(self.dependents.get(path_str, ()))
+        return sorted(p for p in to_validate if p.is_file())
+
+    def rescan(self):
+        """
+        Rebuilds every in-memory index from the tree (after the watcher lost
+        events) and returns all Markdown files to re-validate. Anchors of files
+        unchanged since the anchor index was written are not re-read.
+        """
+        self.file_index = {}
+        self.filename_index = defaultdict(list)
+        self.posix_index = {}
+        self.path_index = set()
+        self.symlink_dirs = set()
+        self._rel_dir_cache = {}
+        self.suffix_trie = {}
+        self.stem_index = defaultdict(list)
+        self.deletes_index = defaultdict(set)
+        self.anchor_cache = {}
+        self.dependencies = {}
+        self.dependents = {}
+        self.build_index()
+        self.prefetch_anchors()
+        return self.markdown_files()
+
+    def watch(self):
+        """
+        Keeps the file index, filename index and anchor cache in memory and
+        re-validates only what a change can affect.
+        """
+        watcher = make_watcher(self.root_dir)
+        print_color(f"Watching {self.root_dir} ({type(watcher).__name__}). Press Ctrl+C to stop.", Colors.OKBLUE)
+        try:
+            while True:
+                changed = watcher.wait()
+                if watcher.root_removed:
+                    print_color(f"{self.root_dir} was removed, stopping watch.", Colors.FAIL)
+                    break
+                started = time.perf_counter()
+                if watcher.overflowed:
+                    print_color("Watch event queue overflowed, rescanning the whole tree...", Colors.WARNING)
+                    to_validate = self.rescan()
+                else:
+                    to_validate = self.apply_changes(changed)
+                if not to_validate:
+                    continue
+                self.issues_count = 0
+                for file_path in to_validate:
+                    self.validate_file(file_path)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                color = Colors.OKGREEN if self.issues_count == 0 else Colors.FAIL
+                print_color(f"[{time.strftime('%H:%M:%S')}] Re-validated {len(to_validate)} file(s) "
+                            f"in {elapsed_ms:.1f} ms: {self.issues_count} broken links/anchors.", color)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+            if self.use_anchor_index and self.root_dir.is_dir():
+                self.save_anchor_index()
+
 def main():
     parser = argparse.ArgumentParser(description="Verify internal Markdown links.")
     parser.add_argument("target_dir", help="Directory to scan")
     parser.add_argument("--fix", action="store_true", help="Attempt to auto-fix broken file links")
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes for anchor extraction (default: all CPU cores)")
+    parser.add_argument("--no-anchor-index", action="store_true",
+                        help=f"Do not read or write the persistent {ANCHOR_INDEX_FILENAME} in the target directory")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the full scan, keep running and re-validate changed files and the files linking to them")
     
     args = parser.parse_args()
     
@@ -279,8 +862,14 @@ def main():
         print_color(f"Error: Directory {args.target_dir} does not exist.", Colors.FAIL)
         sys.exit(1)
         
-    validator = LinkValidator(args.target_dir, args.fix)
+    validator = LinkValidator(args.target_dir, args.fix, jobs=args.jobs,
+                              use_anchor_index=not args.no_anchor_index)
+    if args.watch:
+        validator.dependencies = {}
+        validator.dependents = {}
     validator.run()
+    if args.watch:
+        validator.watch()
 
 if __name__ == "__main__":
     main()
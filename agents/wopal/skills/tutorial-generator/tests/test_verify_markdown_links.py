@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/verify_markdown_links.py
+
+Run:
+    python -m unittest discover -s agents/wopal/skills/tutorial-generator/tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from verify_markdown_links import InotifyWatcher, LinkValidator  # noqa: E402
+
+
+def build_validator(root):
+    validator = LinkValidator(root, use_anchor_index=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        validator.build_index()
+    return validator
+
+
+class LookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "docs"
+        (self.root / "guide").mkdir(parents=True)
+        (self.root / "guide" / "intro.md").write_text("# Intro\n", encoding="utf-8")
+        (Path(self.tmp.name) / "outside.md").write_text("# Outside\n", encoding="utf-8")
+        self.current = self.root / "guide" / "intro.md"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_miss_under_root_does_not_stat(self):
+        validator = build_validator(self.root)
+        with mock.patch.object(Path, "exists", side_effect=AssertionError("stat")):
+            target, _, _ = validator.resolve_path("missing.md", self.current)
+        self.assertIsNone(target)
+
+    def test_outside_root_falls_back_to_filesystem(self):
+        validator = build_validator(self.root)
+        target, _, _ = validator.resolve_path("../../outside.md", self.current)
+        self.assertEqual(target, (Path(self.tmp.name) / "outside.md").resolve())
+
+    def test_symlinked_directory_falls_back_to_filesystem(self):
+        external = Path(self.tmp.name) / "external"
+        external.mkdir()
+        (external / "page.md").write_text("# Page\n", encoding="utf-8")
+        os.symlink(external, self.root / "linked")
+        validator = build_validator(self.root)
+        target, _, _ = validator.resolve_path("/linked/page.md", self.current)
+        self.assertEqual(target, (external / "page.md").resolve())
+
+    def test_watch_add_registers_new_directories(self):
+        validator = build_validator(self.root)
+        new_file = self.root / "new" / "sub" / "page.md"
+        new_file.parent.mkdir(parents=True)
+        new_file.write_text("# Page\n", encoding="utf-8")
+        validator._index_add(new_file)
+        target, _, _ = validator.resolve_path("../new/sub", self.current)
+        self.assertEqual(target, self.root / "new" / "sub")
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class InotifyWatcherMoveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "docs"
+        (self.root / "old" / "nested").mkdir(parents=True)
+        self.watcher = InotifyWatcher(self.root)
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def test_directory_rename_reports_new_paths(self):
+        (self.root / "old").rename(self.root / "new")
+        changed = self.watcher.wait()
+        self.assertIn(str(self.root / "old"), changed)
+        self.assertIn(str(self.root / "new"), changed)
+
+        (self.root / "new" / "nested" / "page.md").write_text("# Page\n", encoding="utf-8")
+        changed = self.watcher.wait()
+        self.assertEqual(changed, {str(self.root / "new" / "nested" / "page.md")})
+        self.assertEqual(sorted(self.watcher.watches.values()),
+                         [str(self.root), str(self.root / "new"), str(self.root / "new" / "nested")])
+
+    def test_directory_moved_out_stops_reporting(self):
+        (self.root / "old").rename(Path(self.tmp.name) / "gone")
+        self.assertEqual(self.watcher.wait(), {str(self.root / "old")})
+        self.assertEqual(list(self.watcher.watches.values()), [str(self.root)])
+
+        (Path(self.tmp.name) / "gone" / "nested" / "page.md").write_text("# Page\n", encoding="utf-8")
+        (self.root / "index.md").write_text("# Index\n", encoding="utf-8")
+        self.assertEqual(self.watcher.wait(), {str(self.root / "index.md")})
+
+
+if __name__ == "__main__":
+    unittest.main()
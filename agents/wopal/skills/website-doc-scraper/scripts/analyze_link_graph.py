@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+analyze_link_graph.py - Reachability analysis over the internal link graph
+
+Uses the link graph index (link_graph.py) to report, in O(V + E):
+- Orphan files: not reachable from the root page (index.md by default)
+- Depth of every reachable file from the root (BFS)
+- In-degree ranking (number of distinct pages linking to each file)
+- Strongly connected components (Tarjan), to spot closed page clusters
+
+Usage:
+    python analyze_link_graph.py <output-dir> [--root index.md] [--top 20] [--format text|json]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from collections import deque, Counter
+from typing import Dict, List, Set
+
+from link_graph import load_graph
+
+
+def build_adjacency(files: Dict) -> Dict[str, Set[str]]:
+    """Internal edges between existing files, self-links and duplicates dropped"""
+    adjacency = {}
+    for source, info in files.items():
+        targets = set()
+        for link in info["links"]:
+            target = link["target"]
+            if target and target != source and target in files:
+                targets.add(target)
+        adjacency[source] = targets
+    return adjacency
+
+
+def bfs_depths(adjacency: Dict[str, Set[str]], root: str) -> Dict[str, int]:
+    """Shortest link distance from root to every reachable file"""
+    if root not in adjacency:
+        return {}
+    depths = {root: 0}
+    queue = deque([root])
+    while queue:
+        node = queue.popleft()
+        for target in adjacency[node]:
+            if target not in depths:
+                depths[target] = depths[node] + 1
+                queue.append(target)
+    return depths
+
+
+def strongly_connected_components(adjacency: Dict[str, Set[str]]) -> List[List[str]]:
+    """Iterative Tarjan's algorithm (no recursion limit on deep graphs)"""
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for start in adjacency:
+        if start in index_of:
+            continue
+        work = [(start, iter(adjacency[start]))]
+        index_of[start] = lowlink[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(adjacency[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+
+    return components
+
+
+def analyze(files: Dict, root: str) -> Dict:
+    """Run all analyses and return a JSON-serializable result"""
+    adjacency = build_adjacency(files)
+    depths = bfs_depths(adjacency, root)
+
+    in_degree = Counter({path: 0 for path in adjacency})
+    for targets in adjacency.values():
+        for target in targets:
+            in_degree[target] += 1
+
+    orphans = sorted(path for path in adjacency if path not in depths)
+    components = strongly_connected_components(adjacency)
+    cyclic = sorted((c for c in components if len(c) > 1), key=len, reverse=True)
+
+    return {
+        "root": root,
+        "root_exists": root in adjacency,
+        "total_files": len(adjacency),
+        "total_edges": sum(len(t) for t in adjacency.values()),
+        "reachable": len(depths),
+        "orphans": orphans,
+        "max_depth": max(depths.values()) if depths else 0,
+        "depth": dict(sorted(depths.items(), key=lambda item: (item[1], item[0]))),
+        "in_degree": dict(sorted(in_degree.items(), key=lambda item: (-item[1], item[0]))),
+        "scc_count": len(components),
+        "cyclic_components": cyclic,
+    }
+
+
+def generate_report(result: Dict, top: int) -> str:
+    """Human-readable summary"""
+    lines = []
+    lines.append("Link Graph Analysis")
+    lines.append("-" * 40)
+    lines.append(f"Root: {result['root']}" + ("" if result["root_exists"] else " (missing!)"))
+    lines.append(f"Files: {result['total_files']}, internal edges: {result['total_edges']}")
+    lines.append(f"Reachable from root: {result['reachable']}, max depth: {result['max_depth']}")
+    lines.append(f"Strongly connected components: {result['scc_count']}")
+    lines.append("")
+
+    depth_histogram = Counter(result["depth"].values())
+    if depth_histogram:
+        lines.append("Depth distribution")
+        lines.append("-" * 40)
+        for depth, count in sorted(depth_histogram.items()):
+            lines.append(f"  depth {depth}: {count}")
+        lines.append("")
+
+    lines.append(f"Top {top} hubs by in-degree")
+    lines.append("-" * 40)
+    for path, degree in list(result["in_degree"].items())[:top]:
+        lines.append(f"  {degree:>5}  {path}")
+    lines.append("")
+
+    if result["cyclic_components"]:
+        largest = result["cyclic_components"][0]
+        lines.append(f"Largest cyclic component: {len(largest)} files")
+        lines.append("")
+
+    orphans = result["orphans"]
+    if orphans:
+        lines.append(f"Orphan files (unreachable from root): {len(orphans)}")
+        lines.append("-" * 40)
+        for path in orphans[:top]:
+            lines.append(f"  {path}")
+        if len(orphans) > top:
+            lines.append(f"  ... and {len(orphans) - top} more")
+    else:
+        lines.append("All files are reachable from root.")
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orphan-page and reachability analysis")
+    parser.add_argument("output_dir", help="Scraped output directory")
+    parser.add_argument("--root", default="index.md", help="Root page, relative to output dir (default: index.md)")
+    parser.add_argument("--top", type=int, default=20, help="Number of entries to list in text output (default: 20)")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+
+    args = parser.parse_args()
+
+    root_dir = Path(args.output_dir)
+    if not root_dir.is_dir():
+        print(f"Error: {root_dir} does not exist", file=sys.stderr)
+        sys.exit(1)
+
+    graph = load_graph(root_dir)
+    result = analyze(graph.files, args.root)
+
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(generate_report(result, args.top))
+
+
+if __name__ == "__main__":
+    main()
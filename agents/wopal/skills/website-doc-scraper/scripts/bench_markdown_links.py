@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_markdown_links.py - Benchmark markdown_links against the previous per-tool regexes
+
+Each link tool used to scan every file with its own regexes (the checker also
+re-scanned the file prefix for every line to detect code blocks). This compares
+those scans with a single markdown_links.iter_links pass over the same content.
+
+Usage:
+    python bench_markdown_links.py [<dir>] [--lines 2000] [--repeat 3]
+
+Without <dir>, a synthetic document of --lines lines is generated.
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Callable, List
+
+from markdown_links import iter_links
+
+# Patterns as previously used by each tool
+CHECK_INCOMPLETE = re.compile(r'\[([^\]]*?)\]\(([^)]*)')
+CHECK_LINK = re.compile(r'\[([^\]]*?)\]\(([^)]+)\)')
+FIX_LINK = re.compile(r'\[([^\]]*?)\]\(([^)]+?)\)')
+EXTRACT_MARKDOWN = re.compile(r'\[([^\]]+)\]\(([^\)]+)\)')
+EXTRACT_HTML = re.compile(r'<a\s+[^>]*href=["\']([^"\']+)["\']')
+VERIFY_LINK = re.compile(r'\[([^\]]+)\]\(([^)"]+)(?: \"[^\"]+\")?\)')
+GRAPH_LINK = re.compile(r'\[([^\]]*?)\]\(([^)]+)\)')
+
+
+def _legacy_in_code_block(content: str, position: int) -> bool:
+    in_code_block = False
+    lines = content[:position].split('\n')
+    for line in lines:
+        if line.strip().startswith('```'):
+            in_code_block = not in_code_block
+    if in_code_block:
+        return True
+    current_line = lines[-1] if lines else ''
+    return current_line.startswith('    ') or current_line.startswith('\t')
+
+
+def legacy_check(content: str) -> int:
+    found = 0
+    position = 0
+    for line in content.splitlines():
+        if not _legacy_in_code_block(content, position):
+            for match in CHECK_INCOMPLETE.finditer(line):
+                if ')' not in line[match.end():]:
+                    found += 1
+            for match in CHECK_LINK.finditer(line):
+                if not _legacy_in_code_block(content, position + match.start()):
+                    found += 1
+        position += len(line) + 1
+    return found
+
+
+def legacy_graph(content: str) -> int:
+    found = 0
+    in_fence = False
+    for line in content.splitlines():
+        if line.lstrip().startswith(('```', '~~~')):
+            in_fence = not in_fence
+            continue
+        if not in_fence:
+            found += len(GRAPH_LINK.findall(line))
+    return found
+
+
+def legacy_other_tools(content: str) -> int:
+    return (len(FIX_LINK.findall(content)) +
+            len(EXTRACT_MARKDOWN.findall(content)) + len(EXTRACT_HTML.findall(content)) +
+            len(VERIFY_LINK.findall(content)))
+
+
+def unified(content: str) -> int:
+    return sum(1 for _ in iter_links(content))
+
+
+def synthetic_document(lines: int) -> str:
+    """Mixed prose, links, images, HTML, inline code and fenced blocks"""
+    parts = []
+    for i in range(lines):
+        kind = i % 10
+        if kind == 0:
+            parts.append(f"## Section {i}")
+        elif kind == 3:
+            parts.append("```python")
+            parts.append(f"print('[not a link](x{i}.md)')")
+            parts.append("```")
+        elif kind == 5:
+            parts.append(f"See ![diagram](img/d{i}.png) and <a href=\"/docs/p{i}\">page</a>.")
+        elif kind == 7:
+            parts.append(f"Use `[code](c{i}.md)` or [guide](../guide/g{i}.md \"Guide\").")
+        else:
+            parts.append(f"Text with [link {i}](/docs/page{i}) and [ext](https://example.com/p{i}#a).")
+    return '\n'.join(parts) + '\n'
+
+
+def _time(func: Callable[[str], int], contents: List[str], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for content in contents:
+            func(content)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared Markdown link parser")
+    parser.add_argument("path", nargs="?", help="Directory of .md files (default: synthetic document)")
+    parser.add_argument("--lines", type=int, default=2000, help="Synthetic document size in lines (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions, best time is reported (default: 3)")
+    args = parser.parse_args()
+
+    if args.path:
+        root = Path(args.path)
+        if not root.is_dir():
+            print(f"Error: {root} does not exist", file=sys.stderr)
+            sys.exit(1)
+        contents = [p.read_text(encoding='utf-8', errors='replace') for p in sorted(root.rglob('*.md'))]
+        source = f"{len(contents)} files under {root}"
+    else:
+        contents = [synthetic_document(args.lines)]
+        source = f"synthetic document, {args.lines} lines"
+
+    total_bytes = sum(len(c.encode('utf-8')) for c in contents)
+    print(f"Input: {source} ({total_bytes / 1024:.1f} KB)")
+    print("-" * 60)
+
+    rows = [
+        ("check_markdown_links (legacy)", legacy_check),
+        ("link_graph (legacy)", legacy_graph),
+        ("fix + extract + verify (legacy)", legacy_other_tools),
+    ]
+    legacy_total = 0.0
+    for name, func in rows:
+        elapsed = _time(func, contents, args.repeat)
+        legacy_total += elapsed
+        print(f"{name:<36} {elapsed * 1000:>10.2f} ms")
+
+    elapsed = _time(unified, contents, args.repeat)
+    tokens = sum(unified(c) for c in contents)
+    print(f"{'legacy total':<36} {legacy_total * 1000:>10.2f} ms")
+    print(f"{'markdown_links.iter_links':<36} {elapsed * 1000:>10.2f} ms  ({tokens} tokens)")
+    if elapsed > 0:
+        print(f"Speedup vs all legacy scans of the same content: {legacy_total / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,41 @@
 # -*- coding: utf-8 -*-
 
 import re
+import sys
 import json
+import argparse
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Iterator, TextIO
 from collections import Counter
 from urllib.parse import urlparse
 
+from markdown_links import iter_links, INLINE, INCOMPLETE
+
+# 链接分类 -> (计数键, 详情列表键)
+CLASSIFICATION_KEYS = {
+    'absolute_path_non_standard': ('absolute_path_non_standard', 'absolute_path_non_standard_detail'),
+    'absolute_path': ('absolute_path_links', 'absolute_path_detail'),
+    'absolute_path_missing_file': ('absolute_path_missing_file', 'absolute_path_missing_detail'),
+    'non_standard': ('non_standard_links', 'non_standard_detail'),
+    'missing_file': ('missing_file_links', 'missing_file_detail'),
+    'format_error': ('format_error_links', 'format_error_detail'),
+    'external_convertible': ('external_convertible_links', 'external_convertible_detail'),
+    'external_missing': ('external_missing_links', 'external_missing_detail'),
+}
+
+
+def count_total_issues(results: Dict, syntax_error_count: int) -> int:
+    """计算问题链接总数（不含可转内链的外链）"""
+    return (results['absolute_path_non_standard'] +
+            results['absolute_path_links'] +
+            results['absolute_path_missing_file'] +
+            results['non_standard_links'] +
+            results['missing_file_links'] +
+            results['format_error_links'] +
+            results['external_missing_links'] +
+            syntax_error_count)
+
+
 class MarkdownLinkChecker:
     """检查标准 Markdown 链接的有效性和规范性"""
     
@@ -104,29 +133,6 @@ class MarkdownLinkChecker:
         clean_path = path.lstrip('/')
         return f'{clean_path}.md'
     
-    def _is_in_code_block(self, content: str, position: int) -> bool:
-        """
-        检查位置是否在代码块中
-        支持 ``` 代码块和缩进代码块
-        """
-        lines = content[:position].split('\n')
-        
-        # 检查是否在 ``` 代码块中
-        in_code_block = False
-        for line in lines:
-            if line.strip().startswith('```'):
-                in_code_block = not in_code_block
-        
-        if in_code_block:
-            return True
-        
-        # 检查是否在缩进代码块中（4个空格或1个tab）
-        current_line = lines[-1] if lines else ''
-        if current_line.startswith('    ') or current_line.startswith('\t'):
-            return True
-        
-        return False
-    
     def _check_link_format(self, link_url: str) -> Tuple[bool, Optional[str]]:
         """
         检查链接格式是否正确
@@ -151,7 +157,7 @@ class MarkdownLinkChecker:
     
     def extract_links_from_file(self, file_path: Path) -> Tuple[List[Tuple[str, str, int]], List[Tuple[str, str, int, str]]]:
         """
-        从文件中提取所有标准 Markdown 链接
+        从文件中提取所有标准 Markdown 链接（基于 markdown_links 解析器）
         排除代码块中的内容
         
         返回: (links, syntax_errors)
@@ -164,40 +170,13 @@ class MarkdownLinkChecker:
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                lines = content.splitlines()
-                
-            current_position = 0
             
-            for line_num, line in enumerate(lines, 1):
-                line_length = len(line) + 1  # +1 for newline
-                line_start_pos = current_position
-                line_end_pos = current_position + line_length
-                
-                # 检查这行是否在代码块中
-                is_in_code = self._is_in_code_block(content, line_start_pos)
-                
-                if not is_in_code:
-                    # 检查不完整的链接（语法错误）
-                    # 匹配 [text]( 但没有闭合的 )
-                    incomplete_matches = re.finditer(r'\[([^\]]*?)\]\(([^)]*)', line)
-                    for match in incomplete_matches:
-                        # 检查是否在同一行有闭合的 )
-                        match_end = match.end()
-                        rest_of_line = line[match_end:]
-                        if ')' not in rest_of_line:
-                            match_pos = line_start_pos + match.start()
-                            if not self._is_in_code_block(content, match_pos):
-                                syntax_errors.append((match.group(1), match.group(2), line_num, "不完整的链接语法"))
-                    
-                    # 匹配完整的标准 Markdown 链接 [text](url)
-                    matches = re.finditer(r'\[([^\]]*?)\]\(([^)]+)\)', line)
-                    for match in matches:
-                        # 检查链接本身是否在代码块中
-                        match_pos = line_start_pos + match.start()
-                        if not self._is_in_code_block(content, match_pos):
-                            links.append((match.group(1), match.group(2), line_num))
-                
-                current_position = line_end_pos
+            # 单遍扫描，跳过 ``` / ~~~ 代码块、行内代码和缩进代码行；图片不算页面链接
+            for token in iter_links(content, (INLINE, INCOMPLETE), skip_indented_code=True):
+                if token.kind == INCOMPLETE:
+                    syntax_errors.append((token.text, token.url, token.line, "不完整的链接语法"))
+                elif token.url:
+                    links.append((token.text, token.url, token.line))
         except Exception as e:
             print(f'错误: 读取文件失败 {file_path}: {e}')
         
@@ -423,9 +402,9 @@ class MarkdownLinkChecker:
         
         return result
     
-    def check_all_links(self) -> Dict:
-        """检查所有文件中的所有 Markdown 链接"""
-        results = {
+    def _new_results(self) -> Dict:
+        """创建空的统计结果（不含详情列表）"""
+        return {
             'total_files': len(self.all_files),
             'total_links': 0,
             'valid_links': 0,
@@ -440,142 +419,127 @@ class MarkdownLinkChecker:
             'syntax_errors': [],  # 语法错误列表
             'files_with_issues': set(),  # 有问题的文件
             'link_types': Counter(),  # 链接类型统计
-            'absolute_path_non_standard_detail': [],  # 绝对路径 + 缺少.md 详情
-            'absolute_path_detail': [],  # 绝对路径详情
-            'absolute_path_missing_detail': [],  # 绝对路径 + 缺少文件详情
-            'non_standard_detail': [],  # 相对路径 + 缺少.md 详情
-            'missing_file_detail': [],  # 相对路径 + 缺少文件详情
-            'format_error_detail': [],  # 格式错误详情
-            'external_convertible_detail': [],  # 可转内链详情
-            'external_missing_detail': [],  # 缺漏外链详情
-
         }
-        
+
+    def iter_link_records(self) -> Iterator[Dict]:
+        """
+        逐个产出链接记录（按文件顺序），不在内存中累积
+
+        每条记录包含 classification 字段；语法错误的 classification 为 'syntax_error'
+        """
         for file_path in self.all_files.values():
             file_relative = file_path.relative_to(self.root_dir).as_posix()
             links, syntax_errors = self.extract_links_from_file(file_path)
-            
-            # 记录语法错误
+
             for link_text, link_url, line_num, reason in syntax_errors:
-                results['syntax_errors'].append({
+                yield {
+                    'classification': 'syntax_error',
                     'source_file': file_relative,
                     'line': line_num,
                     'link_text': link_text,
                     'link_url': link_url,
                     'reason': reason,
-                })
-                results['format_error_links'] += 1
-                results['files_with_issues'].add(file_relative)
-            
-            # 检查每个链接
+                }
+
             for link_text, link_url, line_num in links:
-                results['total_links'] += 1
-                
-                # 分类链接
                 classification = self._classify_link(link_text, link_url, file_path)
-                
-                # 统计链接类型
-                if link_url.startswith(('http://', 'https://')):
-                    results['link_types']['外部链接'] += 1
-                elif link_url.startswith('mailto:'):
-                    results['link_types']['邮件链接'] += 1
-                elif link_url.startswith('#'):
-                    results['link_types']['锚点链接'] += 1
-                else:
-                    results['link_types']['内部链接'] += 1
-                
-                # 根据分类更新统计
-                if classification['classification'] == 'valid':
-                    results['valid_links'] += 1
-                elif classification['classification'] == 'absolute_path_non_standard':
-                    results['absolute_path_non_standard'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['absolute_path_non_standard_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification['target_file'],
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'absolute_path':
-                    results['absolute_path_links'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['absolute_path_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification['target_file'],
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'absolute_path_missing_file':
-                    results['absolute_path_missing_file'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['absolute_path_missing_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification['target_file'],
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'non_standard':
-                    results['non_standard_links'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['non_standard_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification['target_file'],
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'missing_file':
-                    results['missing_file_links'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['missing_file_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification['target_file'],
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'format_error':
-                    results['format_error_links'] += 1
-                    results['files_with_issues'].add(file_relative)
-                    results['format_error_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'external_convertible':
-                    results['external_convertible_links'] += 1
-                    results['external_convertible_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'target_file': classification.get('target_file'),
-                        'reason': classification['reason'],
-                    })
-                elif classification['classification'] == 'external_missing':
-                    results['external_missing_links'] += 1
-                    results['files_with_issues'].add(file_relative)  # 标记为有问题，因为这是遗漏
-                    results['external_missing_detail'].append({
-                        'source_file': file_relative,
-                        'line': line_num,
-                        'link_text': link_text,
-                        'link_url': link_url,
-                        'reason': classification['reason'],
-                    })
-        
+                record = {
+                    'classification': classification['classification'],
+                    'source_file': file_relative,
+                    'line': line_num,
+                    'link_text': link_text,
+                    'link_url': link_url,
+                    'reason': classification['reason'],
+                }
+                if classification['target_file'] is not None:
+                    record['target_file'] = classification['target_file']
+                yield record
+
+    def _tally(self, results: Dict, record: Dict) -> bool:
+        """
+        根据单条链接记录更新计数
+
+        返回: 该记录是否属于问题链接（需要输出详情）
+        """
+        classification = record['classification']
+        link_url = record['link_url']
+
+        if classification == 'syntax_error':
+            results['format_error_links'] += 1
+            results['files_with_issues'].add(record['source_file'])
+            return True
+
+        results['total_links'] += 1
+
+        # 统计链接类型
+        if link_url.startswith(('http://', 'https://')):
+            results['link_types']['外部链接'] += 1
+        elif link_url.startswith('mailto:'):
+            results['link_types']['邮件链接'] += 1
+        elif link_url.startswith('#'):
+            results['link_types']['锚点链接'] += 1
+        else:
+            results['link_types']['内部链接'] += 1
+
+        if classification == 'valid':
+            results['valid_links'] += 1
+            return False
+
+        counter_key, _ = CLASSIFICATION_KEYS[classification]
+        results[counter_key] += 1
+        # 可转内链的外链只是可优化项，不算问题文件
+        if classification != 'external_convertible':
+            results['files_with_issues'].add(record['source_file'])
+        return True
+
+    def check_all_links(self) -> Dict:
+        """检查所有文件中的所有 Markdown 链接"""
+        results = self._new_results()
+        for _, detail_key in CLASSIFICATION_KEYS.values():
+            results[detail_key] = []
+
+        for record in self.iter_link_records():
+            if not self._tally(results, record):
+                continue
+
+            detail = {k: v for k, v in record.items() if k != 'classification'}
+            if record['classification'] == 'syntax_error':
+                results['syntax_errors'].append(detail)
+            else:
+                _, detail_key = CLASSIFICATION_KEYS[record['classification']]
+                results[detail_key].append(detail)
+
         results['files_with_issues'] = list(results['files_with_issues'])
-        
+
         return results
+
+    def stream_results(self, out: TextIO) -> Dict:
+        """
+        流式检查：每发现一个问题链接即输出一行 NDJSON，最后输出汇总计数
+
+        只累积计数，不保留详情列表，内存占用与链接总数无关
+
+        返回: 汇总计数（与 check_all_links 结构相同，但不含详情列表）
+        """
+        results = self._new_results()
+        syntax_error_count = 0
+
+        for record in self.iter_link_records():
+            if not self._tally(results, record):
+                continue
+            if record['classification'] == 'syntax_error':
+                syntax_error_count += 1
+            out.write(json.dumps({'type': 'link', **record}, ensure_ascii=False) + '\n')
+            out.flush()
+
+        results['files_with_issues'] = len(results['files_with_issues'])
+        summary = {k: v for k, v in results.items() if k != 'syntax_errors'}
+        summary['syntax_errors'] = syntax_error_count
+        summary['total_issues'] = count_total_issues(results, syntax_error_count)
+        out.write(json.dumps({'type': 'summary', **summary}, ensure_ascii=False) + '\n')
+        out.flush()
+
+        return summary
     
     def generate_report(self, results: Dict) -> str:
         """生成简化的分析报告"""
@@ -590,14 +554,7 @@ class MarkdownLinkChecker:
         report_lines.append("")
         
         # 链接分类统计
-        total_issues = (results['absolute_path_non_standard'] +
-                       results['absolute_path_links'] +
-                       results['absolute_path_missing_file'] +
-                       results['non_standard_links'] + 
-                       results['missing_file_links'] + 
-                       results['format_error_links'] + 
-                       results['external_missing_links'] +  # 计入问题总数
-                       len(results['syntax_errors']))
+        total_issues = count_total_issues(results, len(results['syntax_errors']))
         
         report_lines.append("链接分类")
         report_lines.append("-" * 40)
@@ -656,14 +613,14 @@ class MarkdownLinkChecker:
 
 def main():
     """主函数"""
-    import sys
-    
-    # 必须提供参数
-    if len(sys.argv) < 2:
-        print('用法: python check_markdown_links.py <目录>')
-        sys.exit(1)
-    
-    target_dir = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description='检查 Markdown 链接的有效性和规范性')
+    parser.add_argument('target_dir', help='要检查的目录')
+    parser.add_argument('--format', choices=['text', 'json', 'ndjson'], default='text',
+                        help='输出格式: text（默认，报告）、json（完整结果）、'
+                             'ndjson（逐条流式输出问题链接，最后一行为汇总）')
+    args = parser.parse_args()
+
+    target_dir = Path(args.target_dir)
     
     # 检查目录是否存在
     if not target_dir.exists():
@@ -672,20 +629,36 @@ def main():
     
     # 创建检查器
     checker = MarkdownLinkChecker(target_dir)
+
+    # 机器可读格式下提示信息写到 stderr，保持 stdout 可解析
+    info_out = sys.stdout if args.format == 'text' else sys.stderr
     
     # 前置检查：pending_urls 是否为空
     is_complete, pending = checker.check_scraping_complete()
     if not is_complete:
-        print("⚠️  抓取未完成，pending_urls 不为空：")
+        print("⚠️  抓取未完成，pending_urls 不为空：", file=info_out)
         for url in pending[:10]:
-            print(f"  - {url}")
+            print(f"  - {url}", file=info_out)
         if len(pending) > 10:
-            print(f"  ... 还有 {len(pending) - 10} 个")
-        print("\n请先完成抓取后再进行链接检查。")
+            print(f"  ... 还有 {len(pending) - 10} 个", file=info_out)
+        print("\n请先完成抓取后再进行链接检查。", file=info_out)
         sys.exit(1)
+
+    if args.format == 'ndjson':
+        summary = checker.stream_results(sys.stdout)
+        if summary['total_issues'] > 0:
+            sys.exit(1)
+        return
     
     # 检查所有链接
     results = checker.check_all_links()
+    total_issues = count_total_issues(results, len(results['syntax_errors']))
+
+    if args.format == 'json':
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        if total_issues > 0:
+            sys.exit(1)
+        return
     
     # 生成并打印报告
     report = checker.generate_report(results)
@@ -709,15 +682,6 @@ def main():
         print("\n建议：将以上 URL 添加到抓取队列后重新运行。")
     
     # 如果有问题链接，返回非零退出码
-    total_issues = (results['absolute_path_non_standard'] +
-                   results['absolute_path_links'] +
-                   results['absolute_path_missing_file'] +
-                   results['non_standard_links'] + 
-                   results['missing_file_links'] + 
-                   results['format_error_links'] + 
-                   results['external_missing_links'] +
-                   len(results['syntax_errors']))
-    
     if total_issues > 0:
         sys.exit(1)
 
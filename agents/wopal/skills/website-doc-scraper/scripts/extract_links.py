@@ -9,14 +9,51 @@ Supports:
 - External links (http/https URLs)
 - Internal links (relative paths like ../config or /docs/api)
 - Anchor links (skipped by default)
+- HTML links: <a>/<area> href and page-type <link> tags (quoted or unquoted,
+  entity-decoded), resolved against <base href>
 """
 
+import os
 import sys
+import json
+import time
 import argparse
 import re
 from pathlib import Path
-from typing import List, Set, Optional, Tuple
+from collections import Counter
+from typing import Dict, List, Set, Optional, Tuple, Callable
+from html.parser import HTMLParser
 from urllib.parse import urljoin, urlparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait, as_completed
+
+from markdown_links import iter_links, mask_code, INLINE, REFERENCE
+from state_manager import ScraperState, INLINK_STATS_FILENAME
+
+# Markdown token kinds that can point at another page (HTML is handled by HtmlLinkExtractor)
+PAGE_LINK_KINDS = (INLINE, REFERENCE)
+
+# <link rel=...> values that point at another page (not stylesheets, icons, ...)
+PAGE_LINK_RELS = {'alternate', 'canonical', 'next', 'prev', 'up'}
+
+# Candidate tags for HtmlLinkExtractor. Comments and script/style bodies are skipped
+# (tag names match case-insensitively, so <SCRIPT>...</script> closes too).
+# Attribute values may not contain '<' or '>', so every match attempt stops at the next
+# '<' or '>' and the scan stays linear even on huge or malformed inline HTML.
+HTML_SCAN_PATTERN = re.compile(
+    r'(?P<skip><!--(?s:.*?)(?:-->|\Z)'
+    r'|<(?i:script)\b(?s:.*?)(?:</(?i:script)\s*>|\Z)'
+    r'|<(?i:style)\b(?s:.*?)(?:</(?i:style)\s*>|\Z))'
+    r'|(?P<tag><(?i:a|area|link|base)\b(?:[^<>"\']|"[^"<>]*"|\'[^\'<>]*\')*>)'
+)
+
+# Files in flight per worker process in parallel mode (bounds memory on huge trees)
+MAX_PENDING_PER_JOB = 8
+
+# Progress counter refresh interval, in files
+PROGRESS_EVERY = 100
+
+# In-link statistics file format (written to INLINK_STATS_FILENAME next to the state)
+INLINK_STATS_VERSION = 1
 
 
 def is_external_link(url: str) -> bool:
@@ -70,6 +107,50 @@ def resolve_internal_link(link_url: str, base_url: str, source_file_path: str =
     return urljoin(base_url.rstrip('/') + '/', clean_url)
 
 
+class HtmlLinkExtractor(HTMLParser):
+    """
+    Collect page links from HTML tags fed one at a time.
+
+    html.parser handles attribute syntax (quoted, unquoted, entity-decoded values);
+    the first <base href> is applied to all relative links at the end.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base_href = None
+        self.hrefs = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        href = (attributes.get('href') or '').strip()
+        if not href:
+            return
+        if tag == 'base':
+            if self.base_href is None:
+                self.base_href = href
+        elif tag in ('a', 'area'):
+            self.hrefs.append(href)
+        elif tag == 'link':
+            rels = (attributes.get('rel') or '').lower().split()
+            if PAGE_LINK_RELS.intersection(rels):
+                self.hrefs.append(href)
+
+    def links(self) -> List[str]:
+        if not self.base_href:
+            return self.hrefs
+        return [href if is_anchor_link(href) else urljoin(self.base_href, href) for href in self.hrefs]
+
+
+def extract_html_links(content: str) -> List[str]:
+    """Extract href values of <a>, <area> and page-type <link> tags, resolved against <base href>"""
+    parser = HtmlLinkExtractor()
+    for match in HTML_SCAN_PATTERN.finditer(content):
+        if match.lastgroup == 'tag':
+            parser.feed(match.group('tag'))
+    parser.close()
+    return parser.links()
+
+
 def extract_links_from_markdown(content: str, base_url: str = "", include_internal: bool = False, source_file_path: str = "") -> List[str]:
     """
     Extract all hyperlinks from Markdown content.
@@ -83,12 +164,6 @@ def extract_links_from_markdown(content: str, base_url: str = "", include_intern
     Returns:
         List of unique URLs found
     """
-    # Pattern for Markdown links: [text](url)
-    markdown_pattern = r'\[([^\]]+)\]\(([^\)]+)\)'
-
-    # Pattern for HTML links: <a href="url">
-    html_pattern = r'<a\s+[^>]*href=["\']([^"\']+)["\']'
-
     urls = set()
 
     def process_url(url: str) -> Optional[str]:
@@ -116,19 +191,18 @@ def extract_links_from_markdown(content: str, base_url: str = "", include_intern
 
         return None
 
-    # Extract from Markdown links
-    for match in re.finditer(markdown_pattern, content):
-        url = match.group(2)
-        processed = process_url(url)
+    # Markdown links and reference definitions, outside code blocks (images are not pages)
+    for token in iter_links(content, PAGE_LINK_KINDS):
+        processed = process_url(token.url)
         if processed:
             urls.add(processed)
 
-    # Extract from HTML links
-    for match in re.finditer(html_pattern, content):
-        url = match.group(1)
-        processed = process_url(url)
-        if processed:
-            urls.add(processed)
+    # HTML links, outside Markdown code blocks
+    if '<' in content:
+        for url in extract_html_links(mask_code(content)):
+            processed = process_url(url)
+            if processed:
+                urls.add(processed)
 
     return sorted(list(urls))
 
@@ -160,25 +234,135 @@ def extract_links_from_file(file_path: Path, base_url: str = "", include_interna
         return []
 
 
-def extract_links_from_directory(dir_path: Path, pattern: str = "*.md", base_url: str = "", include_internal: bool = False) -> List[str]:
+class InlinkStats:
+    """
+    Per-URL in-link counts and linking pages, collected during the scan.
+
+    Kept as page -> outbound URLs so a rescan of a page replaces its old
+    contribution; the per-URL view (count + sources) is derived on save.
+    """
+
+    def __init__(self):
+        self.pages: Dict[str, List[str]] = {}
+
+    def add(self, source: str, urls: List[str]):
+        """Record the (unique) URLs linked from source, replacing any previous scan of it"""
+        self.pages[source] = urls
+
+    def counts(self) -> Counter:
+        """Number of distinct pages linking to each URL"""
+        counter = Counter()
+        for urls in self.pages.values():
+            counter.update(urls)
+        return counter
+
+    def to_dict(self) -> Dict:
+        sources = {}
+        for source, urls in sorted(self.pages.items()):
+            for url in urls:
+                sources.setdefault(url, []).append(source)
+        ranked = sorted(sources.items(), key=lambda item: (-len(item[1]), item[0]))
+        return {
+            "version": INLINK_STATS_VERSION,
+            "urls": {url: {"count": len(pages), "sources": pages} for url, pages in ranked},
+        }
+
+    def load(self, stats_file: Path, root_dir: Optional[Path] = None) -> bool:
+        """
+        Merge a previously saved stats file, for incremental scans (pages not
+        rescanned keep their links). With root_dir, sources whose file no
+        longer exists under it are dropped.
+        """
+        if not stats_file.exists():
+            return False
+        try:
+            data = json.loads(stats_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            print(f"Error loading in-link stats: {e}", file=sys.stderr)
+            return False
+        if data.get("version") != INLINK_STATS_VERSION:
+            return False
+        exists = {}
+        for url, entry in data.get("urls", {}).items():
+            for source in entry.get("sources", []):
+                if root_dir is not None:
+                    if source not in exists:
+                        exists[source] = (root_dir / source).is_file()
+                    if not exists[source]:
+                        continue
+                self.pages.setdefault(source, []).append(url)
+        return True
+
+    def save(self, stats_file: Path):
+        tmp_file = stats_file.with_name(stats_file.name + '.tmp')
+        tmp_file.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_file, stats_file)
+
+
+def extract_links_from_directory(dir_path: Path, pattern: str = "*.md", base_url: str = "", include_internal: bool = False,
+                                 jobs: int = 1, verbose: bool = False,
+                                 url_filter: Optional[Callable[[str], bool]] = None,
+                                 modified_since: Optional[float] = None,
+                                 inlinks: Optional[InlinkStats] = None) -> List[str]:
     """
     Extract links from all files matching a pattern in a directory.
 
+    With jobs > 1, files are handed to a process pool as the directory walk
+    yields them; at most jobs * MAX_PENDING_PER_JOB files are in flight, and
+    results are merged into one set as they complete.
+
     Args:
         dir_path: Directory to scan
         pattern: File pattern to match
         base_url: Base URL for converting internal links
         include_internal: Whether to include internal links
+        jobs: Number of worker processes (1 = scan in this process)
+        verbose: Print a line per scanned file instead of a progress counter
+        url_filter: Keep only URLs for which it returns True, before they are merged
+        modified_since: Only scan files whose mtime is at or after this timestamp
+        inlinks: If given, record which page links to which URL
     """
     all_urls = set()
-
-    for file_path in dir_path.rglob(pattern):
-        print(f"Scanning: {file_path}")
-        urls = extract_links_from_file(file_path, base_url, include_internal, dir_path)
+    scanned = 0
+    show_progress = not verbose and sys.stderr.isatty()
+
+    def collect(file_path: Path, urls: List[str]):
+        nonlocal scanned
+        scanned += 1
+        if url_filter:
+            urls = [url for url in urls if url_filter(url)]
         all_urls.update(urls)
-        print(f"  Found {len(urls)} links")
+        if inlinks is not None:
+            inlinks.add(file_path.relative_to(dir_path).as_posix(), urls)
+        if verbose:
+            print(f"Scanning: {file_path}")
+            print(f"  Found {len(urls)} links")
+        elif show_progress and scanned % PROGRESS_EVERY == 0:
+            print(f"\rScanned {scanned} files, {len(all_urls)} unique URLs", end="", file=sys.stderr, flush=True)
+
+    files = dir_path.rglob(pattern)
+    if modified_since is not None:
+        files = (file_path for file_path in files if file_path.stat().st_mtime >= modified_since)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = {}
+            for file_path in files:
+                if len(pending) >= jobs * MAX_PENDING_PER_JOB:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(pending.pop(future), future.result())
+                future = executor.submit(extract_links_from_file, file_path, base_url, include_internal, dir_path)
+                pending[future] = file_path
+            for future in as_completed(pending):
+                collect(pending[future], future.result())
+    else:
+        for file_path in files:
+            collect(file_path, extract_links_from_file(file_path, base_url, include_internal, dir_path))
+
+    if show_progress:
+        print(f"\rScanned {scanned} files, {len(all_urls)} unique URLs", file=sys.stderr)
 
-    return sorted(list(all_urls))
+    return sorted(all_urls)
 
 
 def main():
@@ -189,28 +373,89 @@ def main():
     parser.add_argument("--base-url", help="Base URL for converting internal links (e.g., https://example.com)")
     parser.add_argument("--include-internal", action="store_true",
                         help="Include internal links (relative/absolute paths). Requires --base-url.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for directory scans (default: 1; 0 = all CPU cores)")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Print every scanned file (default: progress counter on a terminal)")
+    parser.add_argument("--add-to-state", action="store_true",
+                        help="Add in-scope URLs directly to the pending queue of the scraper state "
+                             "in the scanned directory (filtered by domain and path_filter)")
+    parser.add_argument("--inlink-stats", action="store_true",
+                        help=f"Record per-URL in-link counts and linking pages in <dir>/{INLINK_STATS_FILENAME} "
+                             "(merged with the existing file on --new-only and single-file scans)")
+    parser.add_argument("--new-only", action="store_true",
+                        help="With --add-to-state: only scan files modified since the previous --new-only run")
 
     args = parser.parse_args()
 
-    # Validate arguments
-    if args.include_internal and not args.base_url:
-        print("Error: --include-internal requires --base-url", file=sys.stderr)
-        sys.exit(1)
-
     path = Path(args.path)
 
     if not path.exists():
         print(f"Error: {path} does not exist", file=sys.stderr)
         sys.exit(1)
 
+    if args.new_only and not args.add_to_state:
+        print("Error: --new-only requires --add-to-state", file=sys.stderr)
+        sys.exit(1)
+
+    state = None
+    url_filter = None
+    modified_since = None
+    scan_started = time.time()
+    if args.add_to_state:
+        state = ScraperState(path if path.is_dir() else path.parent)
+        if not state.load():
+            print(f"Error: no scraper state found in {state.output_dir}", file=sys.stderr)
+            sys.exit(1)
+        if not state.data.get("domain"):
+            print("Error: scraper state has no domain, run state_manager.py init first", file=sys.stderr)
+            sys.exit(1)
+        args.base_url = args.base_url or state.data.get("base_url")
+        url_filter = state.is_valid_url
+        if args.new_only:
+            modified_since = state.data.get("discovery_watermark")
+            if modified_since is not None:
+                print(f"Scanning files modified since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(modified_since))}")
+
+    # Validate arguments
+    if args.include_internal and not args.base_url:
+        print("Error: --include-internal requires --base-url", file=sys.stderr)
+        sys.exit(1)
+
+    inlinks = None
+    stats_file = (path if path.is_dir() else path.parent) / INLINK_STATS_FILENAME
+    if args.inlink_stats:
+        inlinks = InlinkStats()
+        # A full directory scan rebuilds the stats; incremental scans keep the
+        # links of pages not rescanned, minus pages deleted or renamed since
+        if path.is_file() or modified_since is not None:
+            inlinks.load(stats_file, stats_file.parent)
+
     if path.is_file():
         urls = extract_links_from_file(path, args.base_url or "", args.include_internal, path.parent)
+        if url_filter:
+            urls = [url for url in urls if url_filter(url)]
+        if inlinks is not None:
+            inlinks.add(path.name, urls)
     else:
-        urls = extract_links_from_directory(path, args.pattern, args.base_url or "", args.include_internal)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        urls = extract_links_from_directory(path, args.pattern, args.base_url or "", args.include_internal,
+                                            jobs=jobs, verbose=args.verbose, url_filter=url_filter,
+                                            modified_since=modified_since, inlinks=inlinks)
+
+    if inlinks is not None:
+        inlinks.save(stats_file)
+        print(f"In-link stats for {len(inlinks.counts())} URLs saved to: {stats_file}")
 
     print(f"\nTotal unique URLs found: {len(urls)}")
 
-    if args.output:
+    if state:
+        state.add_urls(urls)
+        if args.new_only:
+            # Files saved while this scan was running are picked up by the next one
+            state.data["discovery_watermark"] = scan_started
+        state.save()
+    elif args.output:
         output_path = Path(args.output)
         output_path.write_text('\n'.join(urls), encoding='utf-8')
         print(f"Saved to: {output_path}")
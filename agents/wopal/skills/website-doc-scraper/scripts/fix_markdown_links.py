@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import re
+import os
 import sys
 import json
+import difflib
+import argparse
 from pathlib import Path
 from urllib.parse import urlparse
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple, Set
+from concurrent.futures import ProcessPoolExecutor
+
+from state_manager import url_to_relative_path
+from markdown_links import iter_links, INLINE
 
 class MarkdownLinkFixer:
     """修复 Markdown 链接：外链转内链、绝对路径转相对路径、添加后缀"""
@@ -15,6 +21,7 @@ class MarkdownLinkFixer:
         self.root_dir = root_dir
         self.scraper_state = self._load_scraper_state()
         self.url_to_file_map = self._build_url_to_file_map()
+        self._relative_path_cache = {}  # { (source_dir, target_path): relative_path }
         
     def _load_scraper_state(self) -> Optional[Dict]:
         """加载状态文件"""
@@ -27,79 +34,95 @@ class MarkdownLinkFixer:
         return None
     
     def _normalize_url_key(self, url: str) -> str:
-        """规范化 URL 用于键值匹配（移除 fragment）"""
+        """
+        规范化 URL 用于键值匹配：移除 fragment、尾部斜杠和 .md 扩展名
+        （与 check_markdown_links 的判定一致，避免带斜杠的同一页面漏转）
+        """
         try:
             parsed = urlparse(url)
-            # 移除 fragment
-            return f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+            path = parsed.path.rstrip('/')
+            if path.endswith('.md'):
+                path = path[:-3]
+            return f"{parsed.scheme}://{parsed.netloc}{path}"
         except Exception:
             return url
 
-    def _url_to_filename(self, url: str) -> str:
-        """
-        根据 URL 推导文件名（复用 state_manager 的逻辑简化版）
-        注意：这里主要用于从 scraped_urls 推导本地路径
-        """
-        parsed = urlparse(url)
-        path = parsed.path.strip('/')
-        
-        if not path:
-            return "index.md"
-        
-        if parsed.path.endswith('/'):
-            return f"{path}/index.md"
-            
-        # 处理可能的 .md 后缀
-        if path.endswith('.md'):
-            return path
-            
-        return f"{path}.md"
+    def _index_markdown_files(self) -> Set[str]:
+        """扫描输出目录，返回所有 Markdown 文件的相对路径（posix）集合"""
+        files = set()
+        for root, dirs, filenames in os.walk(self.root_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            rel_root = Path(root).relative_to(self.root_dir)
+            for filename in filenames:
+                if filename.endswith('.md'):
+                    files.add((rel_root / filename).as_posix())
+        return files
 
     def _build_url_to_file_map(self) -> Dict[str, str]:
         """
         构建已抓取 URL 到本地文件路径的映射
+
+        以实际文件树为准：
+        1. 优先使用 state 中 save-batch 记录的 url_files（包含 _N 重名文件的真实路径）
+        2. 否则按 state_manager 的命名规则推导 path.md / path/index.md，
+           并只保留在输出目录中真实存在的文件
+        找不到对应文件的 URL 不进入映射，避免改写成指向不存在文件的链接
         """
         if not self.scraper_state:
             return {}
-        
+
+        existing_files = self._index_markdown_files()
+        recorded = {
+            self._normalize_url_key(url): path
+            for url, path in self.scraper_state.get("url_files", {}).items()
+        }
+
         url_map = {}
         for url in self.scraper_state.get("scraped_urls", []):
-            # 存入规范化的 URL
             normalized = self._normalize_url_key(url)
-            # 计算对应的文件名（相对于 root_dir）
-            # 注意：实际文件名可能因重名处理而不同，但在 scraper 逻辑中
-            # URL 和 文件路径是确定的映射关系。如果 state_manager 支持自定义文件名
-            # 这里可能需要更复杂的逻辑。目前假设标准映射。
-            
-            # 为了更准确，我们应该遍历文件系统或重新实现 state_manager 的完整逻辑
-            # 但简单起见，且 state_manager 中的 save_batch_content 也是标准逻辑
-            # 我们这里使用推定路径。
-            
-            # 更好的方法：如果我们能从 state 知道确切的文件路径最好
-            # 但 state 目前只存了 URL。
-            filename = self._url_to_filename(url)
-            url_map[normalized] = filename
-            
+
+            recorded_path = recorded.get(normalized)
+            if recorded_path in existing_files:
+                url_map[normalized] = recorded_path
+                continue
+
+            # scraped_urls 已去掉尾部斜杠，目录页可能保存为 path/index.md
+            for candidate in (url_to_relative_path(url), url_to_relative_path(url + '/')):
+                candidate_path = candidate.as_posix()
+                if candidate_path in existing_files:
+                    url_map[normalized] = candidate_path
+                    break
+
         return url_map
 
-    def _compute_relative_path(self, source_file: Path, target_path_str: str) -> str:
-        """计算相对路径"""
-        source_relative = source_file.relative_to(self.root_dir)
-        source_dir = source_relative.parent
-        
+    def _compute_relative_path(self, source_dir: Path, target_path_str: str) -> str:
+        """
+        计算相对路径
+
+        结果按 (源目录, 目标路径) 缓存：同一目录下的文件大量链接到相同目标，
+        避免每个链接都重复 Path 构造和 relative_to 计算
+        """
+        cache_key = (source_dir, target_path_str)
+        cached = self._relative_path_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         target_path = Path(target_path_str)
         
         # 如果源目录是根目录
         if str(source_dir) == '.':
-            return target_path.as_posix()
-            
-        try:
-            return target_path.relative_to(source_dir).as_posix()
-        except ValueError:
-            # 需要向上回溯
-            up_levels = len(source_dir.parts)
-            prefix = '../' * up_levels
-            return f"{prefix}{target_path.as_posix()}"
+            result = target_path.as_posix()
+        else:
+            try:
+                result = target_path.relative_to(source_dir).as_posix()
+            except ValueError:
+                # 需要向上回溯
+                up_levels = len(source_dir.parts)
+                prefix = '../' * up_levels
+                result = f"{prefix}{target_path.as_posix()}"
+
+        self._relative_path_cache[cache_key] = result
+        return result
 
     def _try_convert_external(self, url: str) -> Optional[str]:
         """
@@ -153,23 +176,15 @@ class MarkdownLinkFixer:
         # 除非我们要强制规范化
         return None
 
-    def fix_file(self, file_path: Path) -> bool:
-        """处理单个文件"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"✗ 无法读取 {file_path}: {e}")
-            return False
+    def rewrite_content(self, file_path: Path, content: str) -> str:
+        """对单个文件的内容执行链接改写，返回新内容（不做任何 IO）"""
+        source_dir = file_path.relative_to(self.root_dir).parent
 
-        def replace_link(match: re.Match) -> str:
-            full_match = match.group(0)
-            link_text = match.group(1)
-            link_url = match.group(2)
-            
+        def rewrite_url(link_url: str) -> Optional[str]:
+            """返回改写后的链接地址；None 表示保持原样"""
             # Step 1: 跳过纯锚点
             if link_url.startswith('#'):
-                return full_match
+                return None
             
             target_path = None
             anchor_suffix = ''
@@ -188,9 +203,9 @@ class MarkdownLinkFixer:
                 if converted_path:
                     target_path = converted_path
                 else:
-                    return full_match # 真正的外链，跳过
+                    return None # 真正的外链，跳过
             elif link_url.startswith(('mailto:', 'data:', 'ftp://')):
-                return full_match
+                return None
             else:
                 # Step 3: 处理内链
                 # 先尝试规范化
@@ -218,57 +233,145 @@ class MarkdownLinkFixer:
                     # 让我们简化策略：
                     # 旧逻辑中：compute_relative_path 会处理 ../ 等
                     # 所以如果 _normalize_internal_link 返回 None，我们假设它是同级文件或正确的相对路径
-                    return full_match
+                    return None
 
             # 计算最终的相对路径
             if target_path:
                 try:
-                    relative_path = self._compute_relative_path(file_path, target_path)
-                    return f'[{link_text}]({relative_path}{anchor_suffix})'
+                    relative_path = self._compute_relative_path(source_dir, target_path)
+                    return f'{relative_path}{anchor_suffix}'
                 except Exception:
-                    return full_match # 计算失败保持原样
+                    return None # 计算失败保持原样
             
-            return full_match
+            return None
 
-        new_content = re.sub(r'\[([^\]]*?)\]\(([^)]+?)\)', replace_link, content, flags=re.MULTILINE)
-        
-        if new_content != content:
-            with open(file_path, 'w', encoding='utf-8') as f:
+        # 只替换链接地址部分（保留标题等其余文本）；图片和代码块中的链接不处理
+        pieces = []
+        last_end = 0
+        for token in iter_links(content, (INLINE,)):
+            if not token.url:
+                continue
+            new_url = rewrite_url(token.url)
+            if new_url is None or new_url == token.url:
+                continue
+            pieces.append(content[last_end:token.url_start])
+            pieces.append(new_url)
+            last_end = token.url_end
+        if not pieces:
+            return content
+        pieces.append(content[last_end:])
+        return ''.join(pieces)
+
+    def fix_file(self, file_path: Path, dry_run: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        处理单个文件
+
+        只有内容发生变化时才写回，且通过临时文件 + os.replace 原子替换
+        返回: (是否修改, dry_run 时的 unified diff)
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except Exception as e:
+            print(f"✗ 无法读取 {file_path}: {e}")
+            return False, None
+
+        new_content = self.rewrite_content(file_path, content)
+        if new_content == content:
+            return False, None
+
+        if dry_run:
+            rel_path = file_path.relative_to(self.root_dir).as_posix()
+            diff = difflib.unified_diff(
+                content.splitlines(keepends=True),
+                new_content.splitlines(keepends=True),
+                fromfile=f'a/{rel_path}',
+                tofile=f'b/{rel_path}',
+            )
+            return True, ''.join(diff)
+
+        tmp_path = file_path.with_name(f'.{file_path.name}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(new_content)
-            print(f"✓ {file_path.name}")
-            return True
-            
-        return False
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            print(f"✗ 无法写入 {file_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return False, None
+        return True, None
+
+    def process_directory(self, jobs: int = 1, dry_run: bool = False) -> Tuple[int, int]:
+        """
+        处理整个目录
+
+        jobs > 1 时使用进程池并行改写，输出顺序仍按文件路径排序
+        """
+        md_files = sorted(self.root_dir.rglob('*.md'))
+
+        if jobs > 1 and len(md_files) > 1:
+            chunksize = max(1, len(md_files) // (jobs * 8))
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(self.root_dir,)) as executor:
+                results = executor.map(_fix_in_worker, md_files, [dry_run] * len(md_files),
+                                       chunksize=chunksize)
+                outcomes = list(zip(md_files, results))
+        else:
+            outcomes = ((md_file, self.fix_file(md_file, dry_run)) for md_file in md_files)
 
-    def process_directory(self) -> tuple[int, int]:
-        """处理整个目录"""
         processed = 0
         modified = 0
-        for md_file in sorted(self.root_dir.rglob('*.md')):
+        for md_file, (changed, diff) in outcomes:
             processed += 1
-            if self.fix_file(md_file):
+            if changed:
                 modified += 1
+                if diff:
+                    sys.stdout.write(diff)
+                else:
+                    print(f"✓ {md_file.name}")
         return processed, modified
 
 
+# 进程池 worker 内的修复器实例（每个 worker 初始化一次）
+_worker_fixer: Optional[MarkdownLinkFixer] = None
+
+
+def _init_worker(root_dir: Path):
+    global _worker_fixer
+    _worker_fixer = MarkdownLinkFixer(root_dir)
+
+
+def _fix_in_worker(file_path: Path, dry_run: bool) -> Tuple[bool, Optional[str]]:
+    return _worker_fixer.fix_file(file_path, dry_run)
+
+
 def main():
-    if len(sys.argv) < 2:
-        print('用法: python fix_markdown_links.py <目录>')
-        sys.exit(1)
-    
-    target_dir = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description='修复 Markdown 链接：外链转内链、绝对路径转相对路径、添加后缀')
+    parser.add_argument('target_dir', help='要处理的目录')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='并行 worker 进程数（默认 1；0 表示使用全部 CPU 核心）')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只输出 unified diff，不修改文件')
+    args = parser.parse_args()
+
+    target_dir = Path(args.target_dir)
     if not target_dir.exists():
         print(f'错误: 目录不存在: {target_dir}')
         sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
         
     print(f'开始处理目录: {target_dir}')
     print('-' * 50)
     
     fixer = MarkdownLinkFixer(target_dir)
-    processed, modified = fixer.process_directory()
+    processed, modified = fixer.process_directory(jobs=jobs, dry_run=args.dry_run)
     
     print('-' * 50)
-    print(f'处理完成: 共 {processed} 个文件，修改了 {modified} 个文件')
+    if args.dry_run:
+        print(f'预览完成: 共 {processed} 个文件，将修改 {modified} 个文件（未写入）')
+    else:
+        print(f'处理完成: 共 {processed} 个文件，修改了 {modified} 个文件')
 
 if __name__ == '__main__':
     main()
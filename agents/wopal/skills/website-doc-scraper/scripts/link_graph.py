@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+link_graph.py - Persistent link graph index for a scraped documentation directory
+
+Builds, once per output directory, an index of every Markdown file's outgoing links
+and anchors, and derives the reverse map (target -> inbound references) from it.
+The index is saved to .link-graph.json next to .scraper-state.json and updated
+incrementally: only files whose mtime or size changed are re-parsed.
+
+Usage:
+    python link_graph.py <output-dir> update
+    python link_graph.py <output-dir> inbound docs/intro.md
+    python link_graph.py <output-dir> outbound docs/intro.md
+    python link_graph.py <output-dir> broken
+"""
+
+import os
+import sys
+import json
+import argparse
+import posixpath
+from pathlib import Path
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Iterator
+from urllib.parse import urlparse, unquote
+
+from markdown_links import iter_links, extract_anchors, INLINE, REFERENCE, HTML
+from state_manager import url_to_relative_path
+
+GRAPH_FILENAME = ".link-graph.json"
+STATE_FILENAME = ".scraper-state.json"
+GRAPH_VERSION = 4
+
+GRAPH_LINK_KINDS = (INLINE, REFERENCE, HTML)
+
+
+def parse_markdown(content: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    Parse links and anchors (via markdown_links), skipping fenced code blocks.
+
+    Returns:
+        (links, anchors)
+        - links: [(link_url, line_num)]
+        - anchors: GitHub heading slugs (ATX and setext, -N suffixes for duplicates) and HTML ids
+    """
+    links = [(token.url, token.line) for token in iter_links(content, GRAPH_LINK_KINDS) if token.url]
+    return links, extract_anchors(content)
+
+
+class LinkGraph:
+    """Link graph over all Markdown files in an output directory"""
+
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+        self.graph_file = self.root_dir / GRAPH_FILENAME
+        self.files = {}     # { rel_path: {"mtime", "size", "anchors", "links"} }
+        self._inbound = None
+        self.last_update = (0, 0)   # (rescanned, removed) of the latest update()
+        self.domain = None
+        self.url_files = {}         # state "url_files": URL -> file actually saved (may carry _N)
+        self._indexed_url_files = None  # url_files the cached targets were resolved with
+        self.retargeted = False     # cached targets were re-resolved by the latest update()
+        state_file = self.root_dir / STATE_FILENAME
+        if state_file.exists():
+            try:
+                state = json.loads(state_file.read_text(encoding='utf-8'))
+                self.domain = state.get("domain")
+                self.url_files = state.get("url_files", {})
+            except Exception:
+                pass
+        self._recorded_files = {self._url_key(url): path for url, path in self.url_files.items()}
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        """URL key without trailing slash or .md, as fix_markdown_links matches url_files"""
+        parsed = urlparse(url)
+        path = parsed.path.rstrip('/')
+        if path.endswith('.md'):
+            path = path[:-3]
+        return f"{parsed.scheme}://{parsed.netloc}{path}"
+
+    def load(self) -> bool:
+        """Load the persisted index, if any and compatible"""
+        if not self.graph_file.exists():
+            return False
+        try:
+            data = json.loads(self.graph_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            print(f"Error loading link graph: {e}", file=sys.stderr)
+            return False
+        if data.get("version") != GRAPH_VERSION:
+            return False
+        self.files = data.get("files", {})
+        self._indexed_url_files = data.get("url_files", {})
+        self._inbound = None
+        return True
+
+    def save(self):
+        """Save the index to .link-graph.json"""
+        data = {"version": GRAPH_VERSION, "url_files": self.url_files, "files": self.files}
+        tmp_file = self.graph_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_file, self.graph_file)
+
+    def resolve_target(self, source_rel: str, link_url: str) -> Optional[str]:
+        """
+        Resolve a link to a root-relative .md path, following the same rules as
+        check_markdown_links.py (absolute paths are root-relative, directory URLs
+        map to index.md, missing .md is appended). In-scope external URLs are
+        mapped to the file recorded in the state's url_files, else to the
+        path state_manager.url_to_relative_path gives them.
+
+        Returns None for pure anchors, other protocols and out-of-scope URLs.
+        """
+        file_part = link_url.split('#', 1)[0]
+
+        if link_url.startswith(('http://', 'https://')):
+            parsed = urlparse(file_part)
+            if not self.domain or parsed.netloc != self.domain:
+                return None
+            recorded = self._recorded_files.get(self._url_key(file_part))
+            if recorded:
+                return recorded
+            return url_to_relative_path(file_part).as_posix()
+        elif link_url.startswith(('mailto:', 'data:', 'ftp://', 'tel:', 'javascript:')):
+            return None
+        elif not file_part:
+            return None
+
+        file_part = unquote(file_part)
+        is_dir = file_part.endswith('/')
+        if file_part.startswith('/'):
+            path = file_part.lstrip('/')
+        else:
+            path = posixpath.join(posixpath.dirname(source_rel), file_part)
+        path = posixpath.normpath(path) if path else '.'
+
+        if path == '.':
+            return 'index.md'
+        if is_dir:
+            return f"{path}/index.md"
+        if not path.endswith('.md'):
+            return f"{path}.md"
+        return path
+
+    def _scan_file(self, rel_path: str, abs_path: Path, stat: os.stat_result) -> Dict:
+        try:
+            content = abs_path.read_text(encoding='utf-8')
+        except Exception as e:
+            print(f"Error reading {abs_path}: {e}", file=sys.stderr)
+            content = ""
+
+        links, anchors = parse_markdown(content)
+        entries = []
+        for link_url, line_num in links:
+            anchor = link_url.split('#', 1)[1] if '#' in link_url else None
+            entries.append({
+                "url": link_url,
+                "line": line_num,
+                "target": self.resolve_target(rel_path, link_url),
+                "anchor": anchor,
+            })
+        return {
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "anchors": anchors,
+            "links": entries,
+        }
+
+    def _walk(self) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        stack = [self.root_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.name.endswith('.md') and entry.is_file():
+                    abs_path = Path(entry.path)
+                    rel_path = abs_path.relative_to(self.root_dir).as_posix()
+                    yield rel_path, abs_path, entry.stat()
+
+    def update(self) -> Tuple[int, int]:
+        """
+        Incrementally bring the index up to date with the file tree.
+
+        Returns:
+            (rescanned_count, removed_count)
+        """
+        # Targets of unchanged files depend on url_files too: re-resolve them when it changed
+        self.retargeted = bool(self.files) and self._indexed_url_files != self.url_files
+        if self.retargeted:
+            for rel_path, info in self.files.items():
+                for link in info["links"]:
+                    link["target"] = self.resolve_target(rel_path, link["url"])
+        self._indexed_url_files = self.url_files
+
+        seen = set()
+        rescanned = 0
+        for rel_path, abs_path, stat in self._walk():
+            seen.add(rel_path)
+            cached = self.files.get(rel_path)
+            if cached and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                continue
+            self.files[rel_path] = self._scan_file(rel_path, abs_path, stat)
+            rescanned += 1
+
+        removed = [rel_path for rel_path in self.files if rel_path not in seen]
+        for rel_path in removed:
+            del self.files[rel_path]
+
+        if rescanned or removed or self.retargeted:
+            self._inbound = None
+        self.last_update = (rescanned, len(removed))
+        return self.last_update
+
+    def _build_inbound(self) -> Dict[str, List[Dict]]:
+        inbound = defaultdict(list)
+        for source, info in self.files.items():
+            for link in info["links"]:
+                if link["target"]:
+                    inbound[link["target"]].append({"source": source, **link})
+        return inbound
+
+    def inbound(self, target: str) -> List[Dict]:
+        """Links pointing at target (root-relative path): [{source, url, line, ...}]"""
+        if self._inbound is None:
+            self._inbound = self._build_inbound()
+        return self._inbound.get(target, [])
+
+    def outbound(self, source: str) -> List[Dict]:
+        """Links found in source (root-relative path)"""
+        info = self.files.get(source)
+        return info["links"] if info else []
+
+    def anchors(self, rel_path: str) -> List[str]:
+        info = self.files.get(rel_path)
+        return info["anchors"] if info else []
+
+    def broken_links(self) -> Iterator[Dict]:
+        """
+        Yield internal links whose target file or anchor does not exist.
+
+        Each record: {source, url, line, target, anchor, reason}
+        """
+        anchor_sets = {}
+        for source, info in self.files.items():
+            for link in info["links"]:
+                target = link["target"]
+                if not target:
+                    continue
+                if target not in self.files:
+                    yield {"source": source, **link, "reason": "missing_file"}
+                    continue
+                anchor = link["anchor"]
+                if anchor:
+                    if target not in anchor_sets:
+                        anchor_sets[target] = set(self.files[target]["anchors"])
+                    if anchor not in anchor_sets[target]:
+                        yield {"source": source, **link, "reason": "missing_anchor"}
+
+
+def load_graph(root_dir) -> LinkGraph:
+    """Load the index for root_dir, bring it up to date and persist it"""
+    graph = LinkGraph(root_dir)
+    graph.load()
+    rescanned, removed = graph.update()
+    if rescanned or removed or graph.retargeted or not graph.graph_file.exists():
+        graph.save()
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent link graph index for scraped docs")
+    parser.add_argument("output_dir", help="Scraped output directory")
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+
+    subparsers.add_parser("update", help="Build or incrementally update the index")
+    inbound_parser = subparsers.add_parser("inbound", help="List links pointing at a file")
+    inbound_parser.add_argument("file", help="Target path relative to output dir")
+    outbound_parser = subparsers.add_parser("outbound", help="List links found in a file")
+    outbound_parser.add_argument("file", help="Source path relative to output dir")
+    subparsers.add_parser("broken", help="List internal links with missing file or anchor")
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    root_dir = Path(args.output_dir)
+    if not root_dir.is_dir():
+        print(f"Error: {root_dir} does not exist", file=sys.stderr)
+        sys.exit(1)
+
+    graph = load_graph(root_dir)
+
+    if args.command == "update":
+        rescanned, removed = graph.last_update
+        print(json.dumps({
+            "files": len(graph.files),
+            "rescanned": rescanned,
+            "removed": removed,
+        }))
+
+    elif args.command == "inbound":
+        for link in graph.inbound(args.file):
+            print(f"{link['source']}:{link['line']}\t{link['url']}")
+
+    elif args.command == "outbound":
+        for link in graph.outbound(args.file):
+            print(f"{link['line']}\t{link['url']}\t{link['target'] or '-'}")
+
+    elif args.command == "broken":
+        broken = list(graph.broken_links())
+        for link in broken:
+            print(f"{link['source']}:{link['line']}\t{link['url']}\t{link['reason']}")
+        if broken:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+markdown_links.py - Shared single-pass Markdown link tokenizer
+
+One compiled regex walks the content once and yields typed link tokens with
+offsets and line numbers. Fenced code blocks and inline code spans are skipped
+(optionally also indented code lines), so every link tool sees the same links.
+
+Token kinds:
+- inline:     [text](url "title")
+- image:      ![alt](src "title")
+- reference:  [label]: url "title"   (reference definition)
+- html:       <a href="url">
+- incomplete: [text](url  without a closing ')' on the same line
+
+extract_anchors() collects the anchors a document defines (GitHub header slugs,
+ATX and setext, plus HTML ids), skipping fenced code blocks with the same fence
+rule as the link scanner.
+
+Used by check_markdown_links.py, fix_markdown_links.py, extract_links.py and
+link_graph.py. tutorial-generator/scripts/markdown_links.py is a copy of this
+file (skills are deployed independently); keep the two in sync.
+"""
+
+import re
+import unicodedata
+from typing import Iterator, Optional, Collection, NamedTuple, List, Dict
+
+INLINE = 'inline'
+IMAGE = 'image'
+REFERENCE = 'reference'
+HTML = 'html'
+INCOMPLETE = 'incomplete'
+
+ALL_KINDS = frozenset({INLINE, IMAGE, REFERENCE, HTML, INCOMPLETE})
+
+
+class LinkToken(NamedTuple):
+    kind: str
+    text: str               # link text / alt text / reference label ('' for html)
+    url: str                # destination, without <...> brackets
+    title: Optional[str]
+    line: int               # 1-based line of the token start
+    start: int              # offsets of the whole token in the content
+    end: int
+    url_start: int          # offsets of url in the content (for in-place rewrites)
+    url_end: int
+
+
+_TITLE = r'''"[^"\n]*"|'[^'\n]*\''''
+
+_PATTERN_PARTS = [
+    # Fenced code block (``` or ~~~), closed by the same fence or end of content
+    r'(?P<fence>^[ ]{0,3}(?P<fence_mark>`{3,}|~{3,})[^\n]*'
+    r'(?:\n(?s:.*?))?(?:\n[ ]{0,3}(?P=fence_mark)[`~]*[ \t]*(?=\n|\Z)|\Z))',
+    # Inline code span
+    r'(?P<code>(?P<ticks>`+)(?!`).*?(?<!`)(?P=ticks)(?!`))',
+    # Reference definition
+    r'(?P<ref>^[ ]{0,3}\[(?P<ref_label>[^\]\n]+)\]:[ \t]*'
+    r'(?P<ref_url><[^>\n]*>|\S+)(?:[ \t]+(?P<ref_title>' + _TITLE + r'|\([^)\n]*\)))?[ \t]*$)',
+    # Inline link or image; destination and title are split in _split_destination
+    r'(?P<link>(?P<bang>!)?\[(?P<text>[^\]\n]*)\]\((?P<dest>[^)\n]*)\))',
+    # Unclosed inline link on this line
+    r'(?P<incomplete>\[(?P<inc_text>[^\]\n]*)\]\((?P<inc_url>[^)\n]*)(?=\n|\Z))',
+    # HTML anchor ([^<>] keeps each attempt within one tag, so unclosed tags stay linear)
+    r'(?P<html><(?i:a)\b[^<>]*?\b(?i:href)[ \t]*=[ \t]*'
+    r'''(?:"(?P<href_dq>[^"]*)"|'(?P<href_sq>[^']*)'|(?P<href_uq>[^\s"'=<>`]+)))''',
+]
+
+# Indented code: a line starting with 4 spaces or a tab (simplified, as check_markdown_links did)
+_INDENTED_CODE = r'(?P<indented>^(?: {4}|\t)[^\n]*)'
+
+# Every alternative starts with one of these characters; the lookahead lets the
+# scanner reject all other positions without trying each alternative.
+_FIRST_CHAR = r'(?=[ \t\[!<`~])'
+
+TOKEN_PATTERN = re.compile(_FIRST_CHAR + '(?:' + '|'.join(_PATTERN_PARTS) + ')', re.MULTILINE)
+TOKEN_PATTERN_SKIP_INDENTED = re.compile(
+    _FIRST_CHAR + '(?:' + '|'.join([_PATTERN_PARTS[0], _INDENTED_CODE] + _PATTERN_PARTS[1:]) + ')',
+    re.MULTILINE)
+
+
+_TITLE_SUFFIX = re.compile(r'[ \t]+(' + _TITLE + r')$')
+
+
+# Fenced code blocks and inline code spans only, for mask_code
+CODE_PATTERN = re.compile('|'.join(_PATTERN_PARTS[:2]), re.MULTILINE)
+_NON_NEWLINE = re.compile(r'[^\n]')
+
+
+def mask_code(content: str) -> str:
+    """Blank out fenced code blocks and inline code spans, keeping offsets and line breaks"""
+    return CODE_PATTERN.sub(lambda match: _NON_NEWLINE.sub(' ', match.group(0)), content)
+
+
+# Fenced code blocks only, for extract_anchors (inline code stays part of header text)
+FENCE_PATTERN = re.compile(_PATTERN_PARTS[0], re.MULTILINE)
+
+# ATX headers (up to 3 spaces of indentation); closing #'s are stripped separately
+HEADER_PATTERN = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?[ \t]*$')
+ATX_CLOSING_PATTERN = re.compile(r'(?:^|[ \t]+)#+$')
+SETEXT_UNDERLINE_PATTERN = re.compile(r'^ {0,3}(=+|-+)[ \t]*$')
+
+# <a id="anchor-name"></a> or <div id="anchor-name">
+HTML_ID_PATTERN = re.compile(r'id=["\']([^"\']+)["\']')
+
+# Inline markup removed from header text before slugging (GitHub slugs the rendered text)
+_SLUG_LINK_PATTERN = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_SLUG_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def github_slug(text: str) -> str:
+    """
+    Slugify header text exactly like github-slugger: lowercase, drop every character
+    that is not a letter, mark, number, connector punctuation, space or hyphen,
+    then turn each space into a hyphen (runs of spaces are not collapsed).
+    """
+    text = _SLUG_TAG_PATTERN.sub('', _SLUG_LINK_PATTERN.sub(r'\1', text))
+    kept = []
+    for ch in text.lower():
+        category = unicodedata.category(ch)
+        if ch in ' -' or category[0] in 'LMN' or category == 'Pc':
+            kept.append(ch)
+    return ''.join(kept).replace(' ', '-')
+
+
+class GithubSlugger:
+    """Per-document slugger that adds -1, -2, ... suffixes to repeated headers"""
+
+    def __init__(self):
+        self.occurrences: Dict[str, int] = {}
+
+    def slug(self, text: str) -> str:
+        base = github_slug(text)
+        result = base
+        while result in self.occurrences:
+            self.occurrences[base] += 1
+            result = f"{base}-{self.occurrences[base]}"
+        self.occurrences[result] = 0
+        return result
+
+
+def extract_anchors(content: str) -> List[str]:
+    """Header slugs (ATX and setext) and HTML ids defined outside fenced code blocks"""
+    content = FENCE_PATTERN.sub(lambda match: _NON_NEWLINE.sub('', match.group(0)), content)
+    slugger = GithubSlugger()
+    anchors = []
+    prev_text = None  # candidate setext header text
+
+    for line in content.splitlines():
+        header = HEADER_PATTERN.match(line)
+        if header:
+            text = ATX_CLOSING_PATTERN.sub('', (header.group(2) or '')).strip()
+            anchors.append(slugger.slug(text))
+            prev_text = None
+            continue
+
+        if prev_text is not None and SETEXT_UNDERLINE_PATTERN.match(line):
+            anchors.append(slugger.slug(prev_text))
+            prev_text = None
+            continue
+
+        prev_text = line.strip() if line.strip() else None
+
+    anchors.extend(match.group(1) for match in HTML_ID_PATTERN.finditer(content))
+    return anchors
+
+
+def _split_destination(dest: str, start: int) -> tuple[str, int, Optional[str]]:
+    """Split '<url> "title"' into (url, url_start, title), trimming surrounding blanks"""
+    stripped = dest.rstrip(' \t')
+    title = None
+    if stripped.endswith(('"', "'")):
+        match = _TITLE_SUFFIX.search(stripped)
+        if match:
+            title = match.group(1)[1:-1]
+            stripped = stripped[:match.start()]
+    url = stripped.lstrip(' \t')
+    return url, start + len(stripped) - len(url), title
+
+
+def _strip_brackets(url: str, start: int) -> tuple[str, int, int]:
+    if len(url) >= 2 and url[0] == '<' and url[-1] == '>':
+        return url[1:-1], start + 1, start + len(url) - 1
+    return url, start, start + len(url)
+
+
+def iter_links(content: str, kinds: Optional[Collection[str]] = None,
+               skip_indented_code: bool = False) -> Iterator[LinkToken]:
+    """
+    Yield link tokens from content in document order, in a single pass.
+
+    Args:
+        content: Markdown text
+        kinds: token kinds to yield (default: all)
+        skip_indented_code: also ignore lines indented by 4 spaces / a tab
+    """
+    pattern = TOKEN_PATTERN_SKIP_INDENTED if skip_indented_code else TOKEN_PATTERN
+    wanted = ALL_KINDS if kinds is None else frozenset(kinds)
+    line = 1
+    line_pos = 0
+
+    for match in pattern.finditer(content):
+        group = match.lastgroup
+        if group in ('fence', 'code', 'indented'):
+            continue
+
+        if group == 'link':
+            kind = IMAGE if match.group('bang') else INLINE
+            text = match.group('text')
+            url_group, title = 'dest', None
+        elif group == 'ref':
+            kind = REFERENCE
+            text = match.group('ref_label')
+            url_group, title = 'ref_url', match.group('ref_title')
+            title = title[1:-1] if title else None
+        elif group == 'incomplete':
+            kind = INCOMPLETE
+            text = match.group('inc_text')
+            url_group, title = 'inc_url', None
+        else:
+            kind = HTML
+            text = ''
+            url_group = next(g for g in ('href_dq', 'href_sq', 'href_uq') if match.group(g) is not None)
+            title = None
+
+        if kind not in wanted:
+            continue
+
+        start = match.start()
+        line += content.count('\n', line_pos, start)
+        line_pos = start
+
+        raw_url, raw_start = match.group(url_group), match.start(url_group)
+        if kind in (INLINE, IMAGE):
+            raw_url, raw_start, title = _split_destination(raw_url, raw_start)
+        url, url_start, url_end = _strip_brackets(raw_url, raw_start)
+        yield LinkToken(kind, text, url, title, line, start, match.end(), url_start, url_end)
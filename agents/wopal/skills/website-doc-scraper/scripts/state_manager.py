@@ -17,6 +17,7 @@ from urllib.parse import urlparse, urlunparse
 # Constants
 DEFAULT_BATCH_SIZE = 20
 STATE_FILENAME = ".scraper-state.json"
+INLINK_STATS_FILENAME = ".inlink-stats.json"   # Written by extract_links.py --inlink-stats
 IGNORE_EXTENSIONS = {
     '.pdf', '.zip', '.rar', '.tar', '.gz', '.7z',
     '.png', '.jpg', '.jpeg', '.gif', '.svg', '.ico',
@@ -24,6 +25,46 @@ IGNORE_EXTENSIONS = {
     '.exe', '.dmg', '.pkg', '.bin'
 }
 
+
+def url_to_relative_path(url):
+    """
+    Map a page URL to its canonical file path (relative to output dir).
+
+    - Root URL (https://example.com/) -> index.md
+    - Directory URL (https://example.com/docs/) -> docs/index.md
+    - File URL (https://example.com/docs/intro) -> docs/intro.md
+
+    Files saved under a collision suffix (intro_1.md) are not predicted here;
+    their real paths are recorded in the state's "url_files" map.
+    """
+    parsed = urlparse(url)
+
+    # Determine if it's a directory-like URL (ends with /)
+    is_directory_like = parsed.path.endswith('/')
+
+    # Split path into parts, removing empty strings
+    path_parts = [p for p in parsed.path.strip('/').split('/') if p]
+
+    if not path_parts:
+        # Root URL
+        return Path("index.md")
+    if is_directory_like:
+        # Directory URL -> folder/index.md
+        return Path(*path_parts) / "index.md"
+
+    # File URL -> folder/filename.md
+    filename = path_parts[-1]
+    parent_parts = path_parts[:-1]
+
+    # Sanitize filename
+    filename = re.sub(r'[^\w\-.]', '_', filename)
+
+    if not filename.endswith('.md'):
+        filename += '.md'
+
+    return Path(*parent_parts) / filename
+
+
 class ScraperState:
     def __init__(self, output_dir, base_url=None):
         self.output_dir = Path(output_dir)
@@ -39,7 +80,9 @@ class ScraperState:
             "updated_at": time.time(),
             "scraped_urls": [],     # List of successfully scraped URLs
             "pending_urls": [],     # Queue of URLs to scrape
-            "failed_urls": []       # List of failed URLs
+            "failed_urls": [],      # List of failed URLs
+            "url_files": {},        # Normalized URL -> saved file path (relative to output_dir)
+            "discovery_watermark": None  # Start time of the last incremental link discovery
         }
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -170,10 +213,43 @@ class ScraperState:
             self.data["base_url"] = self._extract_base_url(url)
             self.data["domain"] = self._extract_domain(url)
 
+        if filename:
+            self.record_url_file(url, filename)
+
+    def record_url_file(self, url, file_path):
+        """
+        Record the actual file a URL was saved to (url_files manifest).
+        The path may differ from url_to_relative_path() when a collision
+        suffix (_1, _2, ...) was applied.
+
+        A relative path that does not exist from the current directory is
+        taken as relative to output_dir (e.g. import-single --file guide/intro.md).
+        """
+        path = Path(file_path)
+        if not path.is_absolute() and not path.exists():
+            path = self.output_dir / path
+        try:
+            relative = path.resolve().relative_to(self.output_dir.resolve())
+        except ValueError:
+            print(f"⚠️  WARNING: {file_path} is outside {self.output_dir}, file not recorded for {url}",
+                  file=sys.stderr)
+            return
+        self.data.setdefault("url_files", {})[self.normalize_url(url)] = relative.as_posix()
+
     def add_urls(self, urls):
-        """Add discovered URLs to pending queue"""
+        """
+        Add discovered URLs to pending queue.
+
+        urls may be any iterable (e.g. a generator streaming from extract_links).
+
+        Returns:
+            (added_count, skipped_count)
+        """
         added_count = 0
         skipped_count = 0
+        known = set(self.data["scraped_urls"])
+        known.update(self.data["pending_urls"])
+        known.update(self.data["failed_urls"])
 
         for url in urls:
             normalized = self.normalize_url(url)
@@ -187,13 +263,13 @@ class ScraperState:
                     print(f"Skipped: wrong domain {parsed.netloc} != {domain}: {url}", file=sys.stderr)
                 continue
 
-            if (normalized not in self.data["scraped_urls"] and
-                normalized not in self.data["pending_urls"] and
-                normalized not in self.data["failed_urls"]):
+            if normalized not in known:
+                known.add(normalized)
                 self.data["pending_urls"].append(normalized)
                 added_count += 1
 
         print(f"Added {added_count} new URLs, skipped {skipped_count} invalid URLs.")
+        return added_count, skipped_count
 
     def filter_pending(self, pattern, mode='keep'):
         """Filter pending URLs based on regex pattern"""
@@ -222,6 +298,23 @@ class ScraperState:
         removed_count = initial_count - len(new_pending)
         print(f"Filtered pending URLs. Kept {len(new_pending)}, removed {removed_count}.")
 
+    def prioritize_pending(self, inlink_counts):
+        """
+        Reorder pending URLs by in-link count (most linked first).
+
+        Ties keep their current queue order. Counts of URLs that normalize to
+        the same pending URL are summed.
+        """
+        counts = {}
+        for url, count in inlink_counts.items():
+            normalized = self.normalize_url(url)
+            counts[normalized] = counts.get(normalized, 0) + count
+
+        pending = self.data["pending_urls"]
+        pending.sort(key=lambda url: -counts.get(url, 0))
+        linked = sum(1 for url in pending if counts.get(url))
+        print(f"Prioritized {len(pending)} pending URLs ({linked} with in-link counts).")
+
     def get_next_batch(self, size=DEFAULT_BATCH_SIZE):
         """Get next batch of URLs to scrape"""
         batch = self.data["pending_urls"][:size]
@@ -253,6 +346,7 @@ class ScraperState:
             # Remove from scraped if wrongly added (state correction)
             if normalized in self.data["scraped_urls"]:
                 self.data["scraped_urls"].remove(normalized)
+            self.data.get("url_files", {}).pop(normalized, None)
             # Add to failed
             if normalized not in self.data["failed_urls"]:
                 self.data["failed_urls"].append(normalized)
@@ -270,36 +364,7 @@ class ScraperState:
         Generate the correct filename and path for a URL.
         Returns: dict with 'filename' (relative) and 'full_path' (absolute)
         """
-        parsed = urlparse(url)
-
-        # Determine if it's a directory-like URL (ends with /)
-        is_directory_like = parsed.path.endswith('/')
-
-        # Split path into parts, removing empty strings
-        path_parts = [p for p in parsed.path.strip('/').split('/') if p]
-
-        if not path_parts:
-            # Root URL
-            relative_path = Path("index.md")
-        elif is_directory_like:
-            # Directory URL -> folder/index.md
-            relative_path = Path(*path_parts) / "index.md"
-        else:
-            # File URL -> folder/filename.md
-            filename = path_parts[-1]
-            parent_parts = path_parts[:-1]
-
-            # Sanitize filename
-            filename = re.sub(r'[^\w\-.]', '_', filename)
-
-            if not filename.endswith('.md'):
-                filename += '.md'
-
-            if parent_parts:
-                relative_path = Path(*parent_parts) / filename
-            else:
-                relative_path = Path(filename)
-
+        relative_path = url_to_relative_path(url)
         full_path = self.output_dir / relative_path
 
         return {
@@ -346,33 +411,7 @@ class ScraperState:
                 continue
 
             # Generate filename and directory structure from URL
-            parsed = urlparse(url)
-
-            # Determine if it's a directory-like URL (ends with /)
-            is_directory_like = parsed.path.endswith('/')
-
-            # Split path into parts, removing empty strings
-            path_parts = [p for p in parsed.path.strip('/').split('/') if p]
-
-            if not path_parts:
-                # Root URL
-                relative_path = Path("index.md")
-            elif is_directory_like:
-                # Directory URL -> folder/index.md
-                relative_path = Path(*path_parts) / "index.md"
-            else:
-                # File URL -> folder/filename.md
-                # Check if last part already has extension
-                filename = path_parts[-1]
-                parent_parts = path_parts[:-1]
-
-                # Sanitize filename
-                filename = re.sub(r'[^\w\-.]', '_', filename)
-
-                if not filename.endswith('.md'):
-                    filename += '.md'
-
-                relative_path = Path(*parent_parts) / filename
+            relative_path = url_to_relative_path(url)
 
             # Construct full path
             file_path = self.output_dir / relative_path
@@ -393,6 +432,7 @@ class ScraperState:
             try:
                 file_path.write_text(content, encoding='utf-8')
                 saved_files.append((url, str(file_path)))
+                self.record_url_file(url, file_path)
                 print(f"Saved: {file_path}")
             except Exception as e:
                 print(f"Error saving {url}: {e}", file=sys.stderr)
@@ -413,7 +453,7 @@ def main():
     import_parser = subparsers.add_parser("import-single", help="Import single scraped page")
     import_parser.add_argument("--output-dir", required=True, help="Output directory")
     import_parser.add_argument("--url", required=True, help="URL of the page")
-    import_parser.add_argument("--file", help="Path to saved file (optional, for record)")
+    import_parser.add_argument("--file", help="Path to saved file (optional, for record; relative to the current or output directory)")
 
     # Add URLs command
     add_parser = subparsers.add_parser("add-urls", help="Add discovered URLs to pending")
@@ -427,6 +467,11 @@ def main():
     filter_parser.add_argument("--pattern", required=True, help="Regex pattern to filter by")
     filter_parser.add_argument("--mode", choices=["keep", "remove"], default="keep", help="Filter mode: keep (default) or remove matching URLs")
 
+    # Prioritize command
+    prioritize_parser = subparsers.add_parser("prioritize", help="Order pending URLs by in-link count")
+    prioritize_parser.add_argument("--output-dir", required=True, help="Output directory")
+    prioritize_parser.add_argument("--stats-file", help=f"In-link stats JSON (default: <output-dir>/{INLINK_STATS_FILENAME})")
+
     # Preview command
     preview_parser = subparsers.add_parser("preview", help="Preview next batch")
     preview_parser.add_argument("--output-dir", required=True, help="Output directory")
@@ -530,6 +575,21 @@ def main():
         state.filter_pending(args.pattern, args.mode)
         state.save()
 
+    elif args.command == "prioritize":
+        if not state.load():
+            print("State not found.", file=sys.stderr)
+            sys.exit(1)
+
+        stats_file = Path(args.stats_file) if args.stats_file else state.output_dir / INLINK_STATS_FILENAME
+        try:
+            stats = json.loads(stats_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            print(f"Error reading in-link stats {stats_file}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        state.prioritize_pending({url: entry["count"] for url, entry in stats.get("urls", {}).items()})
+        state.save()
+
     elif args.command == "preview":
         if not state.load():
             print("State not found.", file=sys.stderr)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/extract_links.py
+
+Run:
+    python -m unittest discover -s agents/wopal/skills/website-doc-scraper/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from extract_links import extract_html_links  # noqa: E402
+
+
+class ExtractHtmlLinksTest(unittest.TestCase):
+
+    def test_mixed_case_script_closes(self):
+        html = '<SCRIPT>x</script><a href="https://ex.com/a">a</a>'
+        self.assertEqual(extract_html_links(html), ['https://ex.com/a'])
+
+    def test_mixed_case_style_closes(self):
+        html = '<Style>p { color: red }</STYLE><a href="/b">b</a><script>y</Script><a href="/c">c</a>'
+        self.assertEqual(extract_html_links(html), ['/b', '/c'])
+
+    def test_links_inside_script_skipped(self):
+        html = '<script>document.write("<a href=\'/hidden\'>")</SCRIPT><a href="/shown">s</a>'
+        self.assertEqual(extract_html_links(html), ['/shown'])
+
+    def test_style_not_closed_by_script_tag(self):
+        html = '<style>a::after { content: "</script><a href=/no>" }</style><a href="/yes">y</a>'
+        self.assertEqual(extract_html_links(html), ['/yes'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for scripts/link_graph.py
+
+Run:
+    python -m unittest discover -s agents/wopal/skills/website-doc-scraper/tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from link_graph import parse_markdown  # noqa: E402
+
+
+class ParseMarkdownAnchorsTest(unittest.TestCase):
+
+    def test_setext_headings(self):
+        content = "Getting Started\n===============\n\nText.\n\nNext Steps\n---\n"
+        _, anchors = parse_markdown(content)
+        self.assertEqual(anchors, ["getting-started", "next-steps"])
+
+    def test_github_slugs(self):
+        content = "# C++ & Rust: `cargo`  build\n## Über [links](x.md)\n# C++ & Rust: `cargo`  build\n"
+        _, anchors = parse_markdown(content)
+        self.assertEqual(anchors, ["c--rust-cargo--build", "über-links", "c--rust-cargo--build-1"])
+
+    def test_nested_fence_styles(self):
+        content = (
+            "# Before\n"
+            "````markdown\n"
+            "```python\n"
+            "# not a heading\n"
+            "```\n"
+            "~~~\n"
+            "Also not\n"
+            "--------\n"
+            "<a id=\"fenced\"></a>\n"
+            "````\n"
+            "~~~\n"
+            "```\n"
+            "# inside tilde fence\n"
+            "~~~~\n"
+            "# After\n"
+            "<a id=\"real\"></a>\n"
+        )
+        _, anchors = parse_markdown(content)
+        self.assertEqual(anchors, ["before", "after", "real"])
+
+    def test_links_skip_fenced_code(self):
+        content = "[a](a.md)\n~~~~\n[b](b.md)\n~~~\n[c](c.md)\n~~~~\n[d](d.md)\n"
+        links, _ = parse_markdown(content)
+        self.assertEqual(links, [("a.md", 1), ("d.md", 7)])
+
+
+if __name__ == "__main__":
+    unittest.main()